@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'PMS.settings')
 
 application = get_asgi_application()
+
+if os.environ.get('PMS_WARM_UP'):
+    from parkApp.warmup import warm_up
+
+    warm_up(preload_optional=bool(os.environ.get('PMS_WARM_UP_PRELOAD')))
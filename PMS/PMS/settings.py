@@ -49,6 +49,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'parkApp.middleware.ReadReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'PMS.urls'
@@ -75,11 +76,100 @@ WSGI_APPLICATION = 'PMS.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# SQLite is tuned for concurrent bookings and dashboard reads: WAL lets readers
+# run alongside the single writer, IMMEDIATE transactions take the write lock up
+# front (no lock-upgrade "database is locked" errors) and the busy timeout makes
+# writers queue instead of failing. Connections are kept open between requests.
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL;'
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA cache_size=-20000;'
+    'PRAGMA temp_store=MEMORY;'
+    'PRAGMA mmap_size=134217728;'
+    'PRAGMA busy_timeout=20000;'
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': SQLITE_PRAGMAS,
+        },
+    },
+    # Read-only connection used by the read-heavy views (see parkApp.routers).
+    # Point NAME/ENGINE at a replica when moving off SQLite.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': 20,
+            'init_command': SQLITE_PRAGMAS + 'PRAGMA query_only=ON;',
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+DATABASE_ROUTERS = ['parkApp.routers.ReadReplicaRouter']
+
+# Request paths whose GET requests are served from the 'replica' connection.
+READ_REPLICA_PATHS = [
+    '/api/slots/',
+    '/api/org-dashboard-stats/',
+    '/api/org-slots/',
+    '/api/org-bookings/',
+    '/api/org-forecast/',
+    '/api/async/',
+    '/org_dashboard/',
+    '/admin_dashboard/',
+]
+
+# Group-commit booking writer (parkApp.booking_writer). When enabled, concurrent
+# bookings in a process are committed together in small batches; this needs a
+# threaded (gthread) or ASGI server so a process has concurrent requests.
+BOOKING_WRITER = {
+    'ENABLED': False,
+    'MAX_BATCH': 50,
+    'MAX_WAIT_MS': 5,
+    'MAX_QUEUE': 500,
+    'TIMEOUT_MS': 2000,
+}
+
+# Checkout holds (parkApp.holds): how long a selected slot stays reserved and how
+# often a process sweeps expired holds back into availability.
+BOOKING_HOLD_TTL_SECONDS = 300
+BOOKING_HOLD_SWEEP_SECONDS = 15
+
+# Holds take capacity away from everyone else, so each client may only create a
+# few per minute (counted in the default cache, i.e. per process unless a
+# shared cache is configured).
+REST_FRAMEWORK = {
+    'DEFAULT_THROTTLE_RATES': {
+        'holds': '10/min',
+    },
+}
+
+# Booking confirmations are queued in the notification outbox and delivered by
+# `manage.py drain_outbox` through this SMTP server (a local stand-in such as
+# `python -m aiosmtpd -n -l localhost:1025` in development).
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_HOST = 'localhost'
+EMAIL_PORT = 1025
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = 'Reserve My Spot <no-reply@reservemyspot.local>'
+
+NOTIFICATION_OUTBOX = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BASE_SECONDS': 30,
 }
 
 
@@ -0,0 +1,23 @@
+# Gunicorn settings for the WSGI deployment: `gunicorn -c gunicorn.conf.py PMS.wsgi`
+# The app is loaded and warmed up once in the master, then workers are forked
+# from it and share its memory copy-on-write.
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# Threads let one worker serve concurrent requests, which the booking writer
+# (BOOKING_WRITER['ENABLED']) needs to batch them; gunicorn switches to the
+# gthread worker whenever threads > 1.
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+# Set PMS_WARM_UP_PRELOAD=1 as well to load qrcode/PIL in the master, trading a
+# bigger master for faster first QR pages in every worker.
+raw_env = ['PMS_WARM_UP=1']
+
+
+def post_fork(server, worker):
+    # Anything opened in the master during warm-up must not be reused here.
+    from django.db import connections
+
+    connections.close_all()
@@ -1,5 +1,123 @@
+from django import forms
 from django.contrib import admin
-from .models import Organization, ParkingSlot,Booking
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Max, Q
+from django.db.models.functions import Lower
+from django.utils.functional import cached_property
+
+from .booking_writer import commit_bookings
+from .ledger import cancel_bookings, capacity_event, check_in_bookings, record
+from .models import Organization, ParkingSlot, Booking, BookingEvent
+
+# Unfiltered tables larger than this get an estimated instead of an exact count.
+ESTIMATE_COUNT_ABOVE = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids a full COUNT(*) on unfiltered changelists: PostgreSQL's
+    planner statistics or, elsewhere, the highest primary key stand in for the
+    row count. Filtered changelists are counted exactly.
+
+    The highest primary key overcounts by the number of deleted rows, so after
+    deletions the last pages of an unfiltered changelist can be empty.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            estimate = self.estimate(queryset)
+            if estimate is not None and estimate > ESTIMATE_COUNT_ABOVE:
+                return estimate
+        return super().count
+
+    @staticmethod
+    def estimate(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            return row[0] if row else None
+        return queryset.model._default_manager.using(queryset.db).aggregate(Max('pk'))['pk__max']
+
+
+class InputFilter(admin.SimpleListFilter):
+    """List filter with a text box instead of one link per possible value."""
+    template = 'admin/input_filter.html'
+
+    def lookups(self, request, model_admin):
+        # Non-empty so the filter is shown; the value comes from the text box.
+        return ((),)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = [
+            (name, value)
+            for name, values in changelist.get_filters_params().items()
+            if name != self.parameter_name
+            for value in (values if isinstance(values, list) else [values])
+        ]
+        yield all_choice
+
+
+class OrganizationIdFilter(InputFilter):
+    title = 'organization ID'
+    parameter_name = 'organization_id'
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(organization_id=self.value())
+        return queryset
+
+
+class LocationFilter(InputFilter):
+    title = 'location'
+    parameter_name = 'location'
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(location__iexact=self.value())
+        return queryset
+
+
+class SlotIdFilter(InputFilter):
+    title = 'slot ID'
+    parameter_name = 'slot_id'
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(slot_id=self.value())
+        return queryset
+
+
+class BookingStatusFilter(admin.SimpleListFilter):
+    """Fixed status choices, so the filter doesn't SELECT DISTINCT over all bookings."""
+    title = 'status'
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return (
+            (Booking.CONFIRMED, 'Confirmed'),
+            (Booking.CANCELLED, 'Cancelled'),
+            (Booking.CHECKED_IN, 'Checked in'),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(status=self.value())
+        return queryset
+
+
+def prefix_range(field, prefix):
+    """Prefix match written as a range so a b-tree index on `field` is used."""
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\uffff'})
+
 
 @admin.register(Organization)
 class OrganizationAdmin(admin.ModelAdmin):
@@ -30,10 +148,52 @@ class ParkingSlotAdmin(admin.ModelAdmin):
         "location",
         "distance"
     )
-    list_filter = ("slot_type", "organization", "location")
-    search_fields = ("organization__name", "name", "address")
+    list_filter = ("slot_type", OrganizationIdFilter, LocationFilter)
+    list_select_related = ("organization",)
+    autocomplete_fields = ("organization",)
+    # Searched through get_search_results below so every term hits an index.
+    search_fields = ("name", "organization__name")
+    search_help_text = "Start of a slot or organization name."
+    ordering = ("id",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            if change:
+                old_total, old_available = ParkingSlot.objects.values_list(
+                    "total_slots", "available_slots"
+                ).get(pk=obj.pk)
+                super().save_model(request, obj, form, change)
+                record([capacity_event(obj, old_total, old_available)])
+            else:
+                super().save_model(request, obj, form, change)
+                record([capacity_event(obj, kind=BookingEvent.OPENED)])
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip().lower()
+        if not term:
+            return queryset, False
+        # Organizations are few; matching them first keeps the slot side on
+        # the name and organization_id indexes.
+        organizations = Organization.objects.alias(name_lower=Lower('name')).filter(
+            prefix_range('name_lower', term)
+        )
+        queryset = queryset.alias(name_lower=Lower('name')).filter(
+            prefix_range('name_lower', term)
+            | Q(organization_id__in=organizations.values('pk'))
+        )
+        return queryset, False
 
 
+class BookingAdminForm(forms.ModelForm):
+    def clean_slot(self):
+        slot = self.cleaned_data['slot']
+        if slot.available_slots <= 0:
+            raise forms.ValidationError("No slots available")
+        return slot
+
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
@@ -48,7 +208,67 @@ class BookingAdmin(admin.ModelAdmin):
         'status',
     )
     
+    form = BookingAdminForm
     readonly_fields = ('created_at',)  # this replaces booking_time
-    list_filter = ('status', 'slot', 'vehicle_type')
-    search_fields = ('customer_name', 'vehicle_number', 'token', 'pin')
+    list_filter = (BookingStatusFilter, 'vehicle_type', 'start_datetime', SlotIdFilter)
+    list_select_related = ('slot', 'slot__organization')
+    autocomplete_fields = ('slot',)
+    # Searched through get_search_results below so every term hits an index.
+    search_fields = ('token', 'vehicle_number', 'customer_name')
+    search_help_text = "Exact token, or the start of a vehicle number or customer name."
     ordering = ('-created_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+
+    actions = ("cancel_selected", "check_in_selected")
+
+    @admin.action(description="Cancel selected bookings and release their spaces")
+    def cancel_selected(self, request, queryset):
+        count = cancel_bookings(queryset)
+        self.message_user(request, f"Cancelled {count} booking(s).")
+
+    @admin.action(description="Check in selected bookings")
+    def check_in_selected(self, request, queryset):
+        count = check_in_bookings(queryset)
+        self.message_user(request, f"Checked in {count} booking(s).")
+
+    # Slot, status and cost feed the booking ledger, so they only change
+    # through the actions above, which record events.
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            # Token and PIN are generated as for bookings made through the API.
+            return self.readonly_fields + ('status', 'token', 'pin')
+        return self.readonly_fields + ('slot', 'status', 'total_cost')
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            return super().save_model(request, obj, form, change)
+        # New bookings go through commit_bookings like the API's, so they take
+        # a space (re-checked under the slot lock) and record a booked event.
+        request_fields = {name: value for name, value in form.cleaned_data.items() if name != 'slot'}
+        booking = commit_bookings([{'slot_id': obj.slot_id, **request_fields}], all_or_nothing=True)[0]
+        for field in Booking._meta.concrete_fields:
+            setattr(obj, field.attname, getattr(booking, field.attname))
+        obj._state.adding = False
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            cancel_bookings(Booking.objects.filter(pk=obj.pk))
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            cancel_bookings(queryset)
+            super().delete_queryset(request, queryset)
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        queryset = queryset.alias(customer_name_lower=Lower('customer_name')).filter(
+            Q(token=term.upper())
+            | prefix_range('vehicle_number', term.upper())
+            | prefix_range('customer_name_lower', term.lower())
+        )
+        return queryset, False
@@ -0,0 +1,119 @@
+"""
+Fleet allocation: place many vehicles across parking slots at the lowest total cost.
+
+The cost of parking one vehicle in a slot is its price for the booking window
+plus a per-kilometre penalty for the slot's distance. Within a vehicle type
+every vehicle costs the same in a given slot, so filling the cheapest slots
+first is an optimal assignment; candidate slots are kept in a heap so only the
+slots actually used are ordered.
+"""
+import heapq
+import re
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Q
+
+from .booking_writer import BookingRejected, commit_bookings
+from .models import Booking, ParkingSlot
+from .notifications import fleet_confirmation_messages
+
+VEHICLE_TYPES = ("2W", "4W")
+DEFAULT_DISTANCE_WEIGHT = 10.0  # Rs. per km
+
+_distance_number = re.compile(r"\d+(?:\.\d+)?")
+
+
+def parse_distance_km(value):
+    """Read a distance such as "0.5 km" or "800 m"; None when there is no number."""
+    match = _distance_number.search(value or "")
+    if not match:
+        return None
+    km = float(match.group())
+    if re.search(r"\d\s*m\b", value.lower()):
+        km /= 1000
+    return km
+
+
+def candidate_slots(vehicle_types, area=""):
+    slots = ParkingSlot.objects.filter(slot_type__in=vehicle_types, available_slots__gt=0)
+    if area:
+        slots = slots.filter(
+            Q(location__icontains=area)
+            | Q(address__icontains=area)
+            | Q(organization__city__icontains=area)
+        )
+    return slots.values_list("id", "slot_type", "available_slots", "price", "distance")
+
+
+def plan_allocation(vehicles, hours, area="", distance_weight=DEFAULT_DISTANCE_WEIGHT):
+    """
+    Assign every vehicle to a slot. `vehicles` are dicts with a 'vehicle_type'.
+    Returns a list of (vehicle index, slot id, cost) ordered by vehicle, or
+    raises BookingRejected when the area can't take them all.
+    """
+    wanted = defaultdict(list)
+    for index, vehicle in enumerate(vehicles):
+        if vehicle.get("vehicle_type") not in VEHICLE_TYPES:
+            raise BookingRejected(f"Vehicle {index + 1} has an invalid vehicle type")
+        wanted[vehicle["vehicle_type"]].append(index)
+
+    rows = list(candidate_slots(list(wanted), area))
+    distances = [parse_distance_km(row[4]) for row in rows]
+    # Slots without a usable distance are treated as the farthest ones.
+    farthest = max((d for d in distances if d is not None), default=0.0)
+
+    heaps = defaultdict(list)
+    for (slot_id, slot_type, available, price, _), km in zip(rows, distances):
+        cost = float(price) * hours + distance_weight * (farthest if km is None else km)
+        heaps[slot_type].append((cost, slot_id, available))
+
+    assignments = []
+    for vehicle_type, indexes in wanted.items():
+        heap = heaps[vehicle_type]
+        heapq.heapify(heap)
+        position = 0
+        while position < len(indexes):
+            if not heap:
+                raise BookingRejected(f"Not enough {vehicle_type} spaces available for this fleet")
+            cost, slot_id, available = heapq.heappop(heap)
+            for index in indexes[position:position + available]:
+                assignments.append((index, slot_id, cost))
+            position += available
+
+    assignments.sort()
+    return assignments
+
+
+def book_fleet(vehicles, customer, start_dt, end_dt, area="", distance_weight=DEFAULT_DISTANCE_WEIGHT):
+    """
+    Plan and book a fleet atomically: either every vehicle gets a booking or
+    none does. `customer` holds customer_name, phone_number and email, who
+    gets one confirmation for the whole fleet. Returns the bookings in vehicle
+    order.
+    """
+    hours = (end_dt - start_dt).total_seconds() / 3600
+    assignments = plan_allocation(vehicles, hours, area, distance_weight)
+    prices = dict(ParkingSlot.objects.filter(
+        pk__in={slot_id for _, slot_id, _ in assignments}
+    ).values_list("id", "price"))
+
+    requests = [
+        {
+            "slot_id": slot_id,
+            "customer_name": customer.get("customer_name"),
+            "phone_number": customer.get("phone_number"),
+            "email": customer.get("email", ""),
+            "vehicle_type": vehicles[index]["vehicle_type"],
+            "vehicle_number": vehicles[index].get("vehicle_number"),
+            "vehicle_brand": vehicles[index].get("vehicle_brand", ""),
+            "start_datetime": start_dt,
+            "end_datetime": end_dt,
+            "total_cost": (prices[slot_id] * Decimal(str(hours))).quantize(Decimal("0.01")),
+            "status": Booking.CONFIRMED,
+        }
+        for index, slot_id, _ in assignments
+    ]
+    # Capacity is re-checked inside the transaction; if another booking took a
+    # planned space in the meantime the whole fleet is rolled back.
+    return commit_bookings(requests, all_or_nothing=True, messages=fleet_confirmation_messages)
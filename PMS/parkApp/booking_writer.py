@@ -0,0 +1,267 @@
+"""
+Group-commit writer for bookings.
+
+During booking rushes every request used to commit its own transaction, so on
+SQLite throughput was capped at one fsync per booking. When
+BOOKING_WRITER['ENABLED'] is set, requests are queued to a per-process writer
+thread that reserves capacity, inserts the bookings and updates the slot
+counters for a small batch in a single transaction, then hands each waiting
+request its own result.
+
+The queue is per process, so batches only form when a process serves several
+requests at once: run it under ASGI or gunicorn's gthread workers (see
+gunicorn.conf.py). Sync workers handle one request at a time and would commit
+every booking on its own.
+"""
+import queue
+import random
+import string
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+
+from .models import Booking, BookingHold, NotificationOutbox, ParkingSlot
+from .ledger import booked_event, record
+from .notifications import confirmation_messages
+
+DEFAULTS = {
+    'ENABLED': False,
+    'MAX_BATCH': 50,      # bookings per transaction
+    'MAX_WAIT_MS': 5,     # how long the first queued booking waits for company
+    'MAX_QUEUE': 500,     # pending bookings before callers are turned away
+    'TIMEOUT_MS': 2000,   # latency budget for a single booking request
+}
+
+TOKEN_ATTEMPTS = 5
+
+
+class BookingRejected(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class BookingQueueFull(Exception):
+    pass
+
+
+def writer_settings():
+    return {**DEFAULTS, **getattr(settings, 'BOOKING_WRITER', {})}
+
+
+def generate_token():
+    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+
+
+def generate_pin():
+    return ''.join(random.choices(string.digits, k=4))
+
+
+def commit_bookings(requests, all_or_nothing=False, messages=confirmation_messages):
+    """
+    Reserve capacity and insert bookings for a batch of requests in one
+    transaction. Each request is a dict of Booking field values with 'slot_id'
+    and optionally the 'hold' token taken when the slot was selected.
+    Returns a Booking or a BookingRejected for every request, in order. With
+    all_or_nothing, the first rejection is raised and nothing is committed.
+    `messages` builds the outbox rows for the bookings that were created.
+    """
+    results = [None] * len(requests)
+    taken = Counter()
+    used_holds = []
+    events = []
+
+    with transaction.atomic():
+        slots = ParkingSlot.objects.select_for_update().in_bulk({r['slot_id'] for r in requests})
+        remaining = {pk: slot.available_slots for pk, slot in slots.items()}
+        # A hold's space was already deducted from available_slots, so a
+        # booking that brings one consumes the hold instead of new capacity.
+        # Holds past expires_at still count until the sweeper releases them;
+        # locking them keeps a concurrent release or sweep from also returning
+        # their space.
+        holds = BookingHold.objects.select_for_update().in_bulk(
+            [r['hold'] for r in requests if r.get('hold')], field_name='token'
+        )
+
+        for i, request in enumerate(requests):
+            slot = slots.get(request['slot_id'])
+            if slot is None:
+                results[i] = BookingRejected("Slot not found", status_code=404)
+                continue
+            hold = holds.pop(request.get('hold'), None)
+            if hold is not None and hold.slot_id != slot.pk:
+                holds[hold.token] = hold
+                hold = None
+            if hold is None and remaining[slot.pk] <= 0:
+                results[i] = BookingRejected("No slots available")
+                continue
+
+            booking = _insert_booking(slot, request)
+            if isinstance(booking, BookingRejected):
+                if hold is not None:
+                    holds[hold.token] = hold
+                results[i] = booking
+                continue
+            if hold is None:
+                remaining[slot.pk] -= 1
+                taken[slot.pk] += 1
+            else:
+                used_holds.append(hold.pk)
+            events.append(booked_event(booking, held=hold is not None))
+            results[i] = booking
+
+        if all_or_nothing:
+            rejected = next((r for r in results if isinstance(r, BookingRejected)), None)
+            if rejected is not None:
+                raise rejected
+
+        for slot_id, count in taken.items():
+            ParkingSlot.objects.filter(pk=slot_id).update(available_slots=F('available_slots') - count)
+        if used_holds:
+            BookingHold.objects.filter(pk__in=used_holds).delete()
+
+        record(events)
+        # Confirmations go out through the outbox worker, not this request.
+        NotificationOutbox.objects.bulk_create(
+            messages([r for r in results if isinstance(r, Booking)])
+        )
+
+    return results
+
+
+def _insert_booking(slot, request):
+    """Insert one booking, retrying token collisions. Returns the Booking or a BookingRejected."""
+    fields = {k: v for k, v in request.items() if k not in ('slot_id', 'hold')}
+    for _ in range(TOKEN_ATTEMPTS):
+        fields.setdefault('token', generate_token())
+        fields.setdefault('pin', generate_pin())
+        try:
+            # Savepoint so a failed insert only rolls back this booking.
+            with transaction.atomic():
+                return Booking.objects.create(slot=slot, **fields)
+        except IntegrityError:
+            # Anything other than a taken token (e.g. a missing required
+            # field) fails the same way on every attempt.
+            if not Booking.objects.filter(token=fields['token']).exists():
+                return BookingRejected("Invalid booking details")
+            fields.pop('token')
+    return BookingRejected("Could not create booking, please retry", status_code=409)
+
+
+def submit_booking(request):
+    """Create a single booking, through the group-commit writer when enabled."""
+    if writer_settings()['ENABLED']:
+        return get_booking_writer().submit(request)
+
+    result = commit_bookings([request])[0]
+    if isinstance(result, BookingRejected):
+        raise result
+    return result
+
+
+class BookingWriter:
+    def __init__(self, max_batch, max_wait_ms, max_queue, timeout_ms):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.timeout = timeout_ms / 1000
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, request):
+        """
+        Queue a booking and wait for its result. Raises BookingQueueFull when
+        the queue is at capacity and BookingRejected when the booking fails or
+        is not committed within the latency budget. A booking the writer has
+        already picked up gets one more budget to finish before the caller is
+        told its outcome is unknown.
+        """
+        future = Future()
+        try:
+            self.queue.put_nowait((request, future))
+        except queue.Full:
+            raise BookingQueueFull()
+        self._ensure_started()
+
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Only bookings the writer hasn't picked up yet can be withdrawn;
+            # one already in a transaction may still commit.
+            if future.cancel():
+                raise BookingRejected("Booking timed out, please retry", status_code=503)
+            try:
+                result = future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                raise BookingRejected(
+                    "Booking is still being processed, check your bookings before retrying",
+                    status_code=503,
+                )
+
+        if isinstance(result, BookingRejected):
+            raise result
+        return result
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='booking-writer', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        # Drop bookings whose callers gave up while queued.
+        return [(request, future) for request, future in batch if future.set_running_or_notify_cancel()]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                continue
+            # Every claimed future must be resolved, or its caller waits until
+            # its own timeout; the thread itself has to survive any failure.
+            try:
+                close_old_connections()
+                results = commit_bookings([request for request, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_booking_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                config = writer_settings()
+                _writer = BookingWriter(
+                    max_batch=config['MAX_BATCH'],
+                    max_wait_ms=config['MAX_WAIT_MS'],
+                    max_queue=config['MAX_QUEUE'],
+                    timeout_ms=config['TIMEOUT_MS'],
+                )
+    return _writer
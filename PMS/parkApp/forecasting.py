@@ -0,0 +1,199 @@
+"""
+Occupancy forecasting from booking history.
+
+Bookings are turned into a (slots x hours) occupancy matrix with NumPy and a
+seasonal hour-of-week model is fitted for every slot at once: the forecast for
+an hour of the week is the recency-weighted mean occupancy of that hour over
+the last few weeks. Results are stored in SlotForecast and served from there.
+
+NumPy is only needed by the nightly recompute, so it is imported inside the
+functions that use it rather than by every web worker that serves forecasts.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, ParkingSlot, SlotForecast
+
+HOURS_PER_WEEK = 168
+# 1970-01-01 was a Thursday; shift epoch hours so index 0 is Monday 00:00.
+EPOCH_WEEKDAY_OFFSET = 3 * 24
+CHUNK_SIZE = 100_000
+
+
+def hour_of_week(dt):
+    return (int(dt.timestamp()) // 3600 + EPOCH_WEEKDAY_OFFSET) % HOURS_PER_WEEK
+
+
+def week_start_hour(now):
+    """Epoch hour of the Monday 00:00 UTC that starts the week containing `now`."""
+    hour = int(now.timestamp()) // 3600
+    return hour - (hour + EPOCH_WEEKDAY_OFFSET) % HOURS_PER_WEEK
+
+
+def load_booking_hours(since, until):
+    """
+    Return (slot_ids, start_hours, end_hours) arrays for the bookings that
+    weren't cancelled overlapping [since, until). Hours are epoch hours; a booking occupies every hour it
+    touches, so end hours are rounded up.
+    """
+    import numpy as np
+
+    rows = (
+        Booking.objects
+        .filter(start_datetime__lt=until, end_datetime__gt=since)
+        .exclude(status=Booking.CANCELLED)
+        .values_list('slot_id', 'start_datetime', 'end_datetime')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+    slot_chunks, start_chunks, end_chunks = [], [], []
+    slot_ids, starts, ends = [], [], []
+    for slot_id, start, end in rows:
+        slot_ids.append(slot_id)
+        starts.append(start.timestamp())
+        ends.append(end.timestamp())
+        if len(slot_ids) == CHUNK_SIZE:
+            slot_chunks.append(np.array(slot_ids, dtype=np.int64))
+            start_chunks.append(np.array(starts, dtype=np.float64))
+            end_chunks.append(np.array(ends, dtype=np.float64))
+            slot_ids, starts, ends = [], [], []
+    slot_chunks.append(np.array(slot_ids, dtype=np.int64))
+    start_chunks.append(np.array(starts, dtype=np.float64))
+    end_chunks.append(np.array(ends, dtype=np.float64))
+
+    start_seconds = np.concatenate(start_chunks)
+    end_seconds = np.concatenate(end_chunks)
+    return (
+        np.concatenate(slot_chunks),
+        np.floor(start_seconds / 3600).astype(np.int64),
+        np.ceil(end_seconds / 3600).astype(np.int64),
+    )
+
+
+def occupancy_matrix(rows, start_hours, end_hours, n_slots, n_hours):
+    """
+    Occupied spaces per slot row and hour column. Each booking adds +1 at its
+    first hour and -1 after its last in a difference matrix, which a cumulative
+    sum along the hour axis turns into occupancy.
+    """
+    import numpy as np
+
+    start_hours = np.clip(start_hours, 0, n_hours)
+    end_hours = np.clip(end_hours, 0, n_hours)
+    keep = end_hours > start_hours
+    rows, start_hours, end_hours = rows[keep], start_hours[keep], end_hours[keep]
+
+    width = n_hours + 1
+    size = n_slots * width
+    diff = (
+        np.bincount(rows * width + start_hours, minlength=size)
+        - np.bincount(rows * width + end_hours, minlength=size)
+    )
+    return np.cumsum(diff.reshape(n_slots, width), axis=1)[:, :n_hours]
+
+
+def fit_hour_of_week(occupancy, decay):
+    """
+    Fit the seasonal model on a (slots x weeks*168) matrix whose first column is
+    a Monday 00:00. Returns ((slots x 168) weighted mean occupancy, weeks of
+    history per slot), with the most recent week weighted 1 and each older week
+    `decay` times less. A slot's history starts at its first week with any
+    bookings; earlier weeks are left out so new slots aren't diluted by them.
+    """
+    import numpy as np
+
+    n_slots, n_hours = occupancy.shape
+    n_weeks = n_hours // HOURS_PER_WEEK
+    weeks = occupancy.reshape(n_slots, n_weeks, HOURS_PER_WEEK)
+
+    booked = weeks.any(axis=2)
+    first_week = np.where(booked.any(axis=1), booked.argmax(axis=1), n_weeks)
+    in_history = np.arange(n_weeks)[None, :] >= first_week[:, None]
+
+    weights = in_history * decay ** np.arange(n_weeks - 1, -1, -1, dtype=np.float64)
+    totals = weights.sum(axis=1, keepdims=True)
+    weights = np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+    return np.einsum('sw,swh->sh', weights, weeks), n_weeks - first_week
+
+
+def recompute_forecasts(weeks=8, decay=0.8, now=None):
+    """Rebuild SlotForecast for every slot from the last `weeks` full weeks."""
+    import numpy as np
+
+    now = now or timezone.now()
+    slots = list(ParkingSlot.objects.values_list('id', 'total_slots'))
+    if not slots:
+        return 0
+
+    slot_ids = np.array([pk for pk, _ in slots], dtype=np.int64)
+    capacity = np.array([total for _, total in slots], dtype=np.float64)
+
+    end_hour = week_start_hour(now)
+    origin_hour = end_hour - weeks * HOURS_PER_WEEK
+    since = datetime.fromtimestamp(origin_hour * 3600, tz=dt_timezone.utc)
+    until = since + timedelta(weeks=weeks)
+
+    booking_slots, start_hours, end_hours = load_booking_hours(since, until)
+    # Map slot ids to matrix rows; bookings of deleted slots are dropped.
+    order = np.argsort(slot_ids)
+    positions = np.searchsorted(slot_ids[order], booking_slots)
+    positions = np.minimum(positions, len(slot_ids) - 1)
+    known = slot_ids[order][positions] == booking_slots
+    rows = order[positions[known]]
+
+    occupancy = occupancy_matrix(
+        rows,
+        start_hours[known] - origin_hour,
+        end_hours[known] - origin_hour,
+        n_slots=len(slot_ids),
+        n_hours=weeks * HOURS_PER_WEEK,
+    )
+    forecast, history_weeks = fit_hour_of_week(occupancy, decay)
+    forecast = np.minimum(forecast, capacity[:, None])
+    forecast = np.round(forecast, 2)
+
+    computed_at = timezone.now()
+    with transaction.atomic():
+        SlotForecast.objects.bulk_create(
+            [
+                SlotForecast(
+                    slot_id=int(slot_id),
+                    occupancy=values.tolist(),
+                    history_weeks=int(history),
+                    computed_at=computed_at,
+                )
+                for slot_id, values, history in zip(slot_ids, forecast, history_weeks)
+            ],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['slot'],
+            update_fields=['occupancy', 'history_weeks', 'computed_at'],
+        )
+    return len(slot_ids)
+
+
+def get_forecast(slot):
+    """The slot's forecast, or None until one has been fitted from bookings."""
+    try:
+        forecast = slot.forecast
+    except SlotForecast.DoesNotExist:
+        return None
+    return forecast if forecast.history_weeks else None
+
+
+def upcoming_hours(forecast, total_slots, start, hours=12):
+    """Expected occupancy for the `hours` hours starting at `start` from a fitted forecast."""
+    first = hour_of_week(start)
+    hour_start = start.replace(minute=0, second=0, microsecond=0)
+    result = []
+    for offset in range(hours):
+        occupied = forecast.occupancy[(first + offset) % HOURS_PER_WEEK]
+        result.append({
+            'time': hour_start + timedelta(hours=offset),
+            'expected_occupied': occupied,
+            'expected_available': max(total_slots - occupied, 0),
+            'occupancy_rate': round(occupied / total_slots, 2) if total_slots else 0,
+        })
+    return result
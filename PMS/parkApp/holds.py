@@ -0,0 +1,107 @@
+"""
+Temporary capacity holds taken between slot selection and booking.
+
+A hold decrements ParkingSlot.available_slots when it is created, so every
+availability query already accounts for active holds without looking at them.
+Expired holds are found through the index on expires_at and released in bulk.
+"""
+import secrets
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .booking_writer import BookingRejected
+from .ledger import hold_event, record
+from .models import BookingEvent, BookingHold, ParkingSlot
+
+
+def hold_ttl():
+    return timedelta(seconds=getattr(settings, 'BOOKING_HOLD_TTL_SECONDS', 300))
+
+
+def create_hold(slot_id, replaces=None):
+    """
+    Reserve one space on a slot; raises BookingRejected if none is free. The
+    hold token `replaces` (the caller's previous hold) is released in the same
+    transaction, so a customer never holds more than one space.
+    """
+    maybe_expire_holds()
+    with transaction.atomic():
+        if replaces:
+            _release(replaces)
+        reserved = ParkingSlot.objects.filter(pk=slot_id, available_slots__gt=0).update(
+            available_slots=F('available_slots') - 1
+        )
+        if not reserved:
+            if not ParkingSlot.objects.filter(pk=slot_id).exists():
+                raise BookingRejected("Slot not found", status_code=404)
+            raise BookingRejected("No slots available")
+        record([hold_event(slot_id, BookingEvent.HELD)])
+        return BookingHold.objects.create(
+            slot_id=slot_id,
+            token=secrets.token_urlsafe(16),
+            expires_at=timezone.now() + hold_ttl(),
+        )
+
+
+def release_hold(token):
+    """Give a hold's space back before it expires. Returns False if it is gone."""
+    with transaction.atomic():
+        return _release(token)
+
+
+def _release(token):
+    # Locked so a booking consuming the same hold can't also count it.
+    hold = BookingHold.objects.select_for_update().filter(token=token).first()
+    if hold is None:
+        return False
+    hold.delete()
+    ParkingSlot.objects.filter(pk=hold.slot_id).update(available_slots=F('available_slots') + 1)
+    record([hold_event(hold.slot_id, BookingEvent.RELEASED)])
+    return True
+
+
+def expire_holds(now=None):
+    """Release every hold that expired by `now`. Returns the number released."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Holds locked by a booking or release in progress are left to them.
+        expired = list(
+            BookingHold.objects.select_for_update(skip_locked=True)
+            .filter(expires_at__lte=now).values_list('id', 'slot_id')
+        )
+        if not expired:
+            return 0
+        BookingHold.objects.filter(id__in=[hold_id for hold_id, _ in expired]).delete()
+        for slot_id, count in Counter(slot_id for _, slot_id in expired).items():
+            ParkingSlot.objects.filter(pk=slot_id).update(available_slots=F('available_slots') + count)
+        record(hold_event(slot_id, BookingEvent.EXPIRED) for _, slot_id in expired)
+    return len(expired)
+
+
+_next_sweep = 0.0
+_sweep_lock = threading.Lock()
+
+
+def sweep_due():
+    """Whether maybe_expire_holds would sweep now; cheap enough to call from async code."""
+    return time.monotonic() >= _next_sweep
+
+
+def maybe_expire_holds():
+    """Run expire_holds at most once per BOOKING_HOLD_SWEEP_SECONDS per process."""
+    global _next_sweep
+    now = time.monotonic()
+    if now < _next_sweep:
+        return 0
+    with _sweep_lock:
+        if now < _next_sweep:
+            return 0
+        _next_sweep = now + getattr(settings, 'BOOKING_HOLD_SWEEP_SECONDS', 15)
+    return expire_holds()
@@ -0,0 +1,174 @@
+"""
+Append-only booking event ledger.
+
+Every change to a slot's capacity or revenue is recorded as a BookingEvent
+holding the deltas it applied; events are built by the helpers below and
+bulk-inserted in the same transaction as the change itself. Slot state is
+rebuilt by adding the events after the latest LedgerSnapshot to that snapshot,
+one grouped query for all slots, and compared against the live counters.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Max, Sum
+
+from .models import Booking, BookingEvent, LedgerSnapshot, ParkingSlot
+
+
+def booked_event(booking, held):
+    """Event for a new booking; a held booking's space was already taken by its hold."""
+    return BookingEvent(
+        slot_id=booking.slot_id,
+        booking=booking,
+        kind=BookingEvent.BOOKED,
+        available_delta=0 if held else -1,
+        revenue_delta=booking.total_cost or 0,
+    )
+
+
+def hold_event(slot_id, kind):
+    return BookingEvent(
+        slot_id=slot_id,
+        kind=kind,
+        available_delta=-1 if kind == BookingEvent.HELD else 1,
+    )
+
+
+def capacity_event(slot, old_total=0, old_available=0, kind=BookingEvent.CAPACITY_EDITED):
+    """Event for a slot created (kind=OPENED) or edited; None if nothing changed."""
+    total_delta = slot.total_slots - old_total
+    available_delta = slot.available_slots - old_available
+    if not total_delta and not available_delta and kind != BookingEvent.OPENED:
+        return None
+    return BookingEvent(
+        slot_id=slot.pk,
+        kind=kind,
+        total_delta=total_delta,
+        available_delta=available_delta,
+    )
+
+
+def record(events):
+    """Append events in one batched insert, skipping empty entries."""
+    return BookingEvent.objects.bulk_create([event for event in events if event is not None])
+
+
+def cancel_bookings(bookings):
+    """Cancel bookings, return their spaces and reverse their revenue."""
+    with transaction.atomic():
+        bookings = list(bookings.select_for_update().exclude(status=Booking.CANCELLED))
+        Booking.objects.filter(pk__in=[b.pk for b in bookings]).update(status=Booking.CANCELLED)
+        released = {}
+        for booking in bookings:
+            released[booking.slot_id] = released.get(booking.slot_id, 0) + 1
+        for slot_id, count in released.items():
+            ParkingSlot.objects.filter(pk=slot_id).update(available_slots=F('available_slots') + count)
+        record(
+            BookingEvent(
+                slot_id=booking.slot_id,
+                booking=booking,
+                kind=BookingEvent.CANCELLED,
+                available_delta=1,
+                revenue_delta=-booking.total_cost,
+            )
+            for booking in bookings
+        )
+    return len(bookings)
+
+
+def check_in_bookings(bookings):
+    with transaction.atomic():
+        bookings = list(bookings.select_for_update().filter(status=Booking.CONFIRMED))
+        Booking.objects.filter(pk__in=[b.pk for b in bookings]).update(status=Booking.CHECKED_IN)
+        record(
+            BookingEvent(slot_id=booking.slot_id, booking=booking, kind=BookingEvent.CHECKED_IN)
+            for booking in bookings
+        )
+    return len(bookings)
+
+
+def latest_snapshot_event_id():
+    return LedgerSnapshot.objects.aggregate(last=Max('last_event_id'))['last'] or 0
+
+
+def rebuild_state(until_event_id=None):
+    """
+    Rebuild {slot_id: {'total_slots', 'available_slots', 'revenue'}} from the
+    newest snapshot plus the events after it (up to `until_event_id`).
+    """
+    since = latest_snapshot_event_id()
+    state = {
+        row['slot_id']: {
+            'total_slots': row['total_slots'],
+            'available_slots': row['available_slots'],
+            'revenue': row['revenue'],
+        }
+        for row in LedgerSnapshot.objects.filter(last_event_id=since).values(
+            'slot_id', 'total_slots', 'available_slots', 'revenue'
+        )
+    }
+
+    events = BookingEvent.objects.filter(id__gt=since)
+    if until_event_id is not None:
+        events = events.filter(id__lte=until_event_id)
+    totals = events.values('slot_id').annotate(
+        total=Sum('total_delta'),
+        available=Sum('available_delta'),
+        revenue=Sum('revenue_delta'),
+    ).order_by()
+
+    for row in totals:
+        slot = state.setdefault(
+            row['slot_id'], {'total_slots': 0, 'available_slots': 0, 'revenue': Decimal('0')}
+        )
+        slot['total_slots'] += row['total']
+        slot['available_slots'] += row['available']
+        slot['revenue'] += row['revenue']
+    return state
+
+
+def take_snapshot():
+    """Store the current ledger state of every slot. Returns the event id covered."""
+    with transaction.atomic():
+        until = BookingEvent.objects.aggregate(last=Max('id'))['last'] or 0
+        if until <= latest_snapshot_event_id():
+            return until
+        state = rebuild_state(until_event_id=until)
+        existing = set(ParkingSlot.objects.filter(pk__in=state).values_list('pk', flat=True))
+        LedgerSnapshot.objects.bulk_create(
+            [
+                LedgerSnapshot(slot_id=slot_id, last_event_id=until, **values)
+                for slot_id, values in state.items()
+                if slot_id in existing
+            ],
+            batch_size=1000,
+        )
+    return until
+
+
+def discrepancies():
+    """
+    Compare the ledger with the live counters. Returns a list of
+    (slot_id, field, ledger value, live value) for every mismatch.
+    """
+    with transaction.atomic():
+        state = rebuild_state()
+        live = ParkingSlot.objects.values_list('id', 'total_slots', 'available_slots')
+        revenue = dict(
+            Booking.objects.exclude(status=Booking.CANCELLED)
+            .values('slot_id').annotate(revenue=Sum('total_cost')).order_by()
+            .values_list('slot_id', 'revenue')
+        )
+
+        empty = {'total_slots': 0, 'available_slots': 0, 'revenue': Decimal('0')}
+        report = []
+        for slot_id, total, available in live:
+            ledger = state.get(slot_id, empty)
+            for field, live_value in (
+                ('total_slots', total),
+                ('available_slots', available),
+                ('revenue', revenue.get(slot_id) or Decimal('0')),
+            ):
+                if ledger[field] != live_value:
+                    report.append((slot_id, field, ledger[field], live_value))
+    return report
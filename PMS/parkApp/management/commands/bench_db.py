@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SCHEMA = """
+CREATE TABLE slot (id INTEGER PRIMARY KEY, name TEXT, total INTEGER, available INTEGER, price REAL);
+CREATE TABLE booking (
+    id INTEGER PRIMARY KEY, slot_id INTEGER REFERENCES slot(id), customer TEXT,
+    start_ts REAL, end_ts REAL, cost REAL
+);
+CREATE INDEX booking_slot ON booking(slot_id);
+"""
+
+# Connection setup of the old settings: rollback journal, default 5s timeout,
+# deferred transactions and a fresh connection per request (CONN_MAX_AGE=0).
+BEFORE = {'pragmas': '', 'timeout': 5, 'begin': 'BEGIN', 'persistent': False}
+AFTER = {
+    'pragmas': settings.SQLITE_PRAGMAS,
+    'timeout': settings.DATABASES['default']['OPTIONS']['timeout'],
+    'begin': 'BEGIN IMMEDIATE',
+    'persistent': True,
+}
+
+
+class Command(BaseCommand):
+    help = "Benchmark mixed booking writes and dashboard reads against SQLite, before and after tuning."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--slots', type=int, default=200)
+
+    def handle(self, *args, **options):
+        for label, config in (('before', BEFORE), ('after', AFTER)):
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, 'bench.sqlite3')
+                self._seed(path, options['slots'])
+                result = self._run(path, config, options)
+            self.stdout.write(
+                f"{label:>6}: {result['reads'] / result['elapsed']:9.0f} reads/s  "
+                f"{result['writes'] / result['elapsed']:8.0f} writes/s  "
+                f"{result['errors']} lock errors"
+            )
+
+    def _seed(self, path, slots):
+        conn = sqlite3.connect(path)
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT INTO slot (id, name, total, available, price) VALUES (?, ?, ?, ?, ?)",
+            [(i, f"Slot {i}", 10 ** 6, 10 ** 6, 20.0) for i in range(1, slots + 1)],
+        )
+        conn.commit()
+        conn.close()
+
+    def _connect(self, path, config):
+        conn = sqlite3.connect(path, timeout=config['timeout'], isolation_level=None,
+                               check_same_thread=False)
+        for pragma in config['pragmas'].split(';'):
+            if pragma.strip():
+                conn.execute(pragma)
+        return conn
+
+    def _run(self, path, config, options):
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['seconds']
+        slots = options['slots']
+
+        def read(conn, i):
+            # Slot listing plus the per-organization dashboard aggregate.
+            conn.execute("SELECT * FROM slot").fetchall()
+            conn.execute(
+                "SELECT COUNT(*), SUM(cost) FROM booking WHERE slot_id = ?", (i % slots + 1,)
+            ).fetchone()
+
+        def write(conn, i):
+            slot_id = i % slots + 1
+            conn.execute(config['begin'])
+            try:
+                conn.execute("SELECT available FROM slot WHERE id = ?", (slot_id,)).fetchone()
+                conn.execute(
+                    "INSERT INTO booking (slot_id, customer, start_ts, end_ts, cost) VALUES (?, ?, ?, ?, ?)",
+                    (slot_id, f"Customer {i}", time.time(), time.time() + 7200, 40.0),
+                )
+                conn.execute("UPDATE slot SET available = available - 1 WHERE id = ?", (slot_id,))
+                conn.execute("COMMIT")
+            except sqlite3.OperationalError:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+        def worker(op, key):
+            conn = self._connect(path, config) if config['persistent'] else None
+            i = 0
+            while time.perf_counter() < deadline:
+                current = conn or self._connect(path, config)
+                try:
+                    op(current, i)
+                    field = key
+                except sqlite3.OperationalError:
+                    field = 'errors'
+                finally:
+                    if conn is None:
+                        current.close()
+                with lock:
+                    counts[field] += 1
+                i += 1
+            if conn is not None:
+                conn.close()
+
+        threads = [threading.Thread(target=worker, args=(read, 'reads')) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=worker, args=(write, 'writes')) for _ in range(options['writers'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counts['elapsed'] = time.perf_counter() - start
+        return counts
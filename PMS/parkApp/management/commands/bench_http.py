@@ -0,0 +1,96 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+
+DEFAULT_PATHS = ['/api/slots/', '/booking_success/?token=ABC123&pin=1234']
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure throughput and latency of a running server at increasing numbers of "
+        "concurrent connections. Run it once against the WSGI deployment "
+        "(gunicorn PMS.wsgi) with the sync paths and once against uvicorn PMS.asgi "
+        "with --async to compare connection capacity."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', default='10,50,200,500',
+                            help="Comma separated numbers of concurrent connections.")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per concurrency level.")
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="Path to request (repeatable). Defaults to the slot list and booking success.")
+        parser.add_argument('--async', action='store_true', dest='use_async',
+                            help="Use the /api/async/ and /booking_success/async/ variants of the paths.")
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        paths = options['paths'] or DEFAULT_PATHS
+        if options['use_async']:
+            paths = [to_async_path(path) for path in paths]
+
+        self.stdout.write(f"{url.netloc} {', '.join(paths)}")
+        for concurrency in (int(c) for c in options['concurrency'].split(',')):
+            result = asyncio.run(run_level(
+                url.hostname, url.port or 80, paths, concurrency, options['requests'], options['timeout'],
+            ))
+            self.stdout.write(
+                f"{concurrency:>5} conns: {result['rps']:8.1f} req/s  "
+                f"p50 {result['p50'] * 1000:7.1f} ms  p99 {result['p99'] * 1000:8.1f} ms  "
+                f"{result['errors']} errors"
+            )
+
+
+def to_async_path(path):
+    if path.startswith('/api/') and not path.startswith('/api/async/'):
+        return '/api/async/' + path[len('/api/'):]
+    if path.startswith('/booking_success/') and not path.startswith('/booking_success/async/'):
+        return '/booking_success/async/' + path[len('/booking_success/'):]
+    return path
+
+
+async def fetch(host, port, path, timeout):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode())
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    status_line = response.split(b'\r\n', 1)[0].split()
+    return len(status_line) > 1 and status_line[1] == b'200'
+
+
+async def run_level(host, port, paths, concurrency, total, timeout):
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def client():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                ok = await fetch(host, port, paths[i % len(paths)], timeout)
+            except (OSError, asyncio.TimeoutError):
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) if latencies else 0,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] if latencies else 0,
+        'errors': errors,
+    }
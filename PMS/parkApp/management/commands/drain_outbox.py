@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from parkApp.notifications import OutboxSender
+
+
+class Command(BaseCommand):
+    help = "Deliver pending booking notifications from the outbox (runs until stopped)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain what is due now and exit.")
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help="Seconds to sleep when nothing is due.")
+
+    def handle(self, *args, **options):
+        sender = OutboxSender()
+        try:
+            while True:
+                close_old_connections()
+                sent, failed, deferred = sender.drain_batch()
+                if deferred:
+                    self.stderr.write(f"SMTP server unavailable, deferred {deferred}.")
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent}, failed {failed}.")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sender.close()
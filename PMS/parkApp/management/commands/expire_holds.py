@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from parkApp.holds import expire_holds
+
+
+class Command(BaseCommand):
+    help = "Release booking holds whose TTL has passed."
+
+    def handle(self, *args, **options):
+        released = expire_holds()
+        self.stdout.write(f"Released {released} expired hold(s).")
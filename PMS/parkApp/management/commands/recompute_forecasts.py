@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from parkApp.forecasting import recompute_forecasts
+
+
+class Command(BaseCommand):
+    help = "Rebuild the hour-of-week occupancy forecasts of every parking slot (run nightly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--weeks', type=int, default=8, help="Weeks of booking history to fit on.")
+        parser.add_argument('--decay', type=float, default=0.8, help="Weight of each older week relative to the next.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = recompute_forecasts(weeks=options['weeks'], decay=options['decay'])
+        self.stdout.write(f"Recomputed forecasts for {count} slot(s) in {time.perf_counter() - started:.1f}s.")
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from parkApp.ledger import discrepancies, rebuild_state, take_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild slot capacity and revenue from the booking event ledger, starting "
+        "from the latest snapshot, and report where it disagrees with the live counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--snapshot', action='store_true',
+                            help="Store a new snapshot so later replays start from here.")
+        parser.add_argument('--show', action='store_true', help="Print the rebuilt state of every slot.")
+
+    def handle(self, *args, **options):
+        if options['snapshot']:
+            event_id = take_snapshot()
+            self.stdout.write(f"Snapshot taken at event {event_id}.")
+
+        if options['show']:
+            for slot_id, values in sorted(rebuild_state().items()):
+                self.stdout.write(
+                    f"slot {slot_id}: total {values['total_slots']}, "
+                    f"available {values['available_slots']}, revenue {values['revenue']}"
+                )
+
+        report = discrepancies()
+        for slot_id, field, ledger_value, live_value in report:
+            self.stdout.write(f"slot {slot_id}: {field} ledger={ledger_value} live={live_value}")
+        if report:
+            self.stdout.write(self.style.WARNING(f"{len(report)} discrepancy(ies) found."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Ledger matches the live counters."))
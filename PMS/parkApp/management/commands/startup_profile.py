@@ -0,0 +1,125 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Run in a fresh interpreter: load the WSGI app, optionally warm it up, then
+# serve one request, timing each step and reporting the process RSS.
+CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+os.environ['DJANGO_SETTINGS_MODULE'] = {settings_module!r}
+from PMS.wsgi import application
+loaded = time.perf_counter()
+if {warm_up!r}:
+    from parkApp.warmup import warm_up
+    warm_up()
+warmed = time.perf_counter()
+
+environ = {{
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': {path!r}, 'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'HTTP_HOST': 'localhost',
+    'wsgi.url_scheme': 'http', 'wsgi.input': sys.stdin.buffer, 'wsgi.errors': sys.stderr,
+}}
+status = []
+b''.join(application(environ, lambda s, h, e=None: status.append(s)))
+served = time.perf_counter()
+
+rss_kb = 0
+with open('/proc/self/status') as f:
+    for line in f:
+        if line.startswith('VmRSS:'):
+            rss_kb = int(line.split()[1])
+print(json.dumps({{
+    'load': loaded - started, 'warm_up': warmed - loaded, 'first_request': served - warmed,
+    'status': status[0] if status else '', 'rss_kb': rss_kb,
+}}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Profile worker start-up: the slowest imports, cold-start time and RSS with and "
+        "without warm-up, and optionally the memory of running gunicorn workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3)
+        parser.add_argument('--top', type=int, default=15, help="Number of slowest imports to list.")
+        parser.add_argument('--path', default='/', help="Path of the first request.")
+        parser.add_argument('--master-pid', type=int,
+                            help="Report RSS/PSS of the workers of this gunicorn master.")
+
+    def handle(self, *args, **options):
+        self.import_profile(options['top'])
+        for warm_up in (False, True):
+            self.cold_start(warm_up, options['runs'], options['path'])
+        if options['master_pid']:
+            self.worker_memory(options['master_pid'])
+
+    def _python(self, *args, env=None):
+        return subprocess.run(
+            [sys.executable, *args], cwd=settings.BASE_DIR, env={**os.environ, **(env or {})},
+            capture_output=True, text=True, stdin=subprocess.DEVNULL,
+        )
+
+    def import_profile(self, top):
+        code = (
+            f"import os; os.environ['DJANGO_SETTINGS_MODULE'] = {settings.SETTINGS_MODULE!r}; "
+            f"import PMS.wsgi; import {settings.ROOT_URLCONF}"
+        )
+        result = self._python('-X', 'importtime', '-c', code)
+        rows = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            # "import time:  <self us> | <cumulative us> | <module>"
+            own_us, cumulative_us, name = line[len('import time:'):].split('|')
+            rows.append((int(cumulative_us), int(own_us), name.rstrip()))
+
+        self.stdout.write("Slowest imports (cumulative ms / self ms):")
+        for cumulative, own, name in sorted(rows, reverse=True)[:top]:
+            self.stdout.write(f"  {cumulative / 1000:8.1f} {own / 1000:8.1f}  {name}")
+
+    def cold_start(self, warm_up, runs, path):
+        code = CHILD.format(settings_module=settings.SETTINGS_MODULE, warm_up=warm_up, path=path)
+        samples = []
+        for _ in range(runs):
+            result = self._python('-c', code)
+            if result.returncode != 0:
+                self.stderr.write(result.stderr)
+                return
+            samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+        best = min(samples, key=lambda s: s['load'] + s['warm_up'] + s['first_request'])
+        label = "with warm-up" if warm_up else "cold"
+        self.stdout.write(
+            f"{label:>12}: load {best['load'] * 1000:7.1f} ms, warm-up {best['warm_up'] * 1000:7.1f} ms, "
+            f"first request {best['first_request'] * 1000:7.1f} ms ({best['status']}), "
+            f"RSS {best['rss_kb'] / 1024:6.1f} MiB"
+        )
+
+    def worker_memory(self, master_pid):
+        children_file = f"/proc/{master_pid}/task/{master_pid}/children"
+        try:
+            with open(children_file) as f:
+                pids = [int(pid) for pid in f.read().split()]
+        except OSError as exc:
+            self.stderr.write(f"Cannot read workers of {master_pid}: {exc}")
+            return
+
+        for pid in [master_pid, *pids]:
+            memory = {}
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    key, _, value = line.partition(':')
+                    if key in ('Rss', 'Pss', 'Private_Dirty'):
+                        memory[key] = int(value.split()[0]) / 1024
+            role = "master" if pid == master_pid else "worker"
+            self.stdout.write(
+                f"{role} {pid}: RSS {memory.get('Rss', 0):6.1f} MiB, PSS {memory.get('Pss', 0):6.1f} MiB, "
+                f"private {memory.get('Private_Dirty', 0):6.1f} MiB"
+            )
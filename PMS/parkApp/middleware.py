@@ -0,0 +1,43 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .routers import reset_replica, use_replica
+
+
+class ReadReplicaMiddleware:
+    """Serve safe requests to the paths in READ_REPLICA_PATHS from the replica."""
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = tuple(getattr(settings, 'READ_REPLICA_PATHS', ()))
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _is_read_only(self, request):
+        return request.method in self.SAFE_METHODS and request.path.startswith(self.paths)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._is_read_only(request):
+            return self.get_response(request)
+
+        token = use_replica()
+        try:
+            return self.get_response(request)
+        finally:
+            reset_replica(token)
+
+    async def __acall__(self, request):
+        if not self._is_read_only(request):
+            return await self.get_response(request)
+
+        token = use_replica()
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_replica(token)
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parkApp', '0005_bookinghold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('occupancy', models.JSONField(default=list)),
+                ('history_weeks', models.IntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('slot', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='parkApp.parkingslot')),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:13
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parkApp', '0006_slotforecast'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['-created_at'], name='booking_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', '-created_at'], name='booking_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['start_datetime'], name='booking_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['vehicle_number'], name='booking_vehicle_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(django.db.models.functions.text.Lower('customer_name'), name='booking_customer_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parkingslot',
+            index=models.Index(fields=['name'], name='parkingslot_name_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def open_ledger(apps, schema_editor):
+    """Start every existing slot's ledger from its current counters and revenue."""
+    ParkingSlot = apps.get_model('parkApp', 'ParkingSlot')
+    Booking = apps.get_model('parkApp', 'Booking')
+    BookingEvent = apps.get_model('parkApp', 'BookingEvent')
+
+    revenue = dict(
+        Booking.objects.exclude(status='cancelled')
+        .values('slot_id').annotate(revenue=Sum('total_cost')).order_by()
+        .values_list('slot_id', 'revenue')
+    )
+    BookingEvent.objects.bulk_create(
+        [
+            BookingEvent(
+                slot_id=slot_id,
+                kind='opened',
+                total_delta=total,
+                available_delta=available,
+                revenue_delta=revenue.get(slot_id) or 0,
+            )
+            for slot_id, total, available in ParkingSlot.objects.values_list(
+                'id', 'total_slots', 'available_slots'
+            )
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parkApp', '0008_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_event_id', models.BigIntegerField(db_index=True)),
+                ('total_slots', models.IntegerField()),
+                ('available_slots', models.IntegerField()),
+                ('revenue', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_snapshots', to='parkApp.parkingslot')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BookingEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('opened', 'Opened'), ('booked', 'Booked'), ('cancelled', 'Cancelled'), ('checked_in', 'Checked in'), ('held', 'Held'), ('released', 'Released'), ('expired', 'Expired'), ('capacity_edited', 'Capacity edited')], max_length=20)),
+                ('total_delta', models.IntegerField(default=0)),
+                ('available_delta', models.IntegerField(default=0)),
+                ('revenue_delta', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='events', to='parkApp.booking')),
+                ('slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='parkApp.parkingslot')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['slot', 'id'], name='event_slot_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:27
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parkApp', '0009_booking_event_ledger'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='parkingslot',
+            name='parkingslot_name_idx',
+        ),
+        migrations.AddIndex(
+            model_name='parkingslot',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='parkingslot_name_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parkApp', '0010_parkingslot_name_lower_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bookingevent',
+            name='slot',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='events', to='parkApp.parkingslot'),
+        ),
+        migrations.AlterField(
+            model_name='ledgersnapshot',
+            name='slot',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_snapshots', to='parkApp.parkingslot'),
+        ),
+    ]
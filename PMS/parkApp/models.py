@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 class Organization(models.Model):
     name = models.CharField(max_length=255)
@@ -36,12 +37,22 @@ class ParkingSlot(models.Model):
     distance = models.CharField(max_length=50, blank=True)   # e.g., "0.5 km"
     address = models.CharField(max_length=255, blank=True)
 
+    class Meta:
+        indexes = [
+            # Admin prefix search on the lowercased name.
+            models.Index(Lower("name"), name="parkingslot_name_lower_idx"),
+        ]
+
     def __str__(self):
         return f"{self.organization.name} - {self.name} ({self.slot_type})"
 
 
 
 class Booking(models.Model):
+    CONFIRMED = "confirmed"
+    CANCELLED = "cancelled"
+    CHECKED_IN = "checked_in"
+
     slot = models.ForeignKey(ParkingSlot, on_delete=models.CASCADE, related_name="bookings")
     customer_name = models.CharField(max_length=255)
     phone_number = models.CharField(max_length=20)
@@ -54,8 +65,146 @@ class Booking(models.Model):
     total_cost = models.DecimalField(max_digits=8, decimal_places=2)
     token = models.CharField(max_length=20, unique=True)
     pin = models.CharField(max_length=10)
-    status = models.CharField(max_length=20, default="confirmed")
+    status = models.CharField(max_length=20, default=CONFIRMED)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Admin changelist: default ordering, filters and prefix search.
+            models.Index(fields=["-created_at"], name="booking_created_idx"),
+            models.Index(fields=["status", "-created_at"], name="booking_status_created_idx"),
+            models.Index(fields=["start_datetime"], name="booking_start_idx"),
+            models.Index(fields=["vehicle_number"], name="booking_vehicle_number_idx"),
+            models.Index(Lower("customer_name"), name="booking_customer_lower_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.customer_name} - {self.slot.name} ({self.token})"
+
+class BookingHold(models.Model):
+    """
+    Short-lived reservation of one space taken when a customer picks a slot.
+    The space is deducted from ParkingSlot.available_slots while the hold
+    exists; expired holds are released in bulk by parkApp.holds.expire_holds.
+    """
+    slot = models.ForeignKey(ParkingSlot, on_delete=models.CASCADE, related_name="holds")
+    token = models.CharField(max_length=32, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Hold {self.token} on {self.slot_id} until {self.expires_at}"
+
+
+class SlotForecast(models.Model):
+    """
+    Precomputed hour-of-week occupancy forecast for a slot, rebuilt in batch by
+    parkApp.forecasting. `occupancy` holds 168 values (Monday 00:00 UTC first):
+    the expected number of occupied spaces in that hour. `history_weeks` is
+    how many weeks of the slot's booking history the forecast was fitted on.
+    """
+    slot = models.OneToOneField(ParkingSlot, on_delete=models.CASCADE, related_name="forecast")
+    occupancy = models.JSONField(default=list)
+    history_weeks = models.IntegerField(default=0)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Forecast for {self.slot_id} ({self.computed_at:%Y-%m-%d %H:%M})"
+
+
+class NotificationOutbox(models.Model):
+    """
+    Customer notification written in the same transaction as its booking and
+    delivered later by the drain_outbox worker (parkApp.notifications).
+    """
+    STATUS_CHOICES = [("pending", "Pending"), ("sent", "Sent"), ("dead", "Dead")]
+
+    booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name="notifications")
+    channel = models.CharField(max_length=10, default="email")
+    recipient = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.channel} to {self.recipient} ({self.status})"
+
+
+class BookingEvent(models.Model):
+    """
+    Append-only ledger of changes to slot capacity and revenue. Each event
+    stores the deltas it applied, so a slot's counters can be rebuilt by
+    summing its events (see parkApp.ledger).
+    """
+    OPENED = "opened"
+    BOOKED = "booked"
+    CANCELLED = "cancelled"
+    CHECKED_IN = "checked_in"
+    HELD = "held"
+    RELEASED = "released"
+    EXPIRED = "expired"
+    CAPACITY_EDITED = "capacity_edited"
+    KIND_CHOICES = [
+        (OPENED, "Opened"),
+        (BOOKED, "Booked"),
+        (CANCELLED, "Cancelled"),
+        (CHECKED_IN, "Checked in"),
+        (HELD, "Held"),
+        (RELEASED, "Released"),
+        (EXPIRED, "Expired"),
+        (CAPACITY_EDITED, "Capacity edited"),
+    ]
+
+    # No constraint or cascade: a deleted slot's history stays in the ledger.
+    slot = models.ForeignKey(
+        ParkingSlot, on_delete=models.DO_NOTHING, db_constraint=False, related_name="events"
+    )
+    booking = models.ForeignKey(
+        Booking, on_delete=models.SET_NULL, blank=True, null=True, related_name="events"
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    total_delta = models.IntegerField(default=0)
+    available_delta = models.IntegerField(default=0)
+    revenue_delta = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["slot", "id"], name="event_slot_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Ledger events are append-only")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.kind} on {self.slot_id} ({self.created_at:%Y-%m-%d %H:%M})"
+
+
+class LedgerSnapshot(models.Model):
+    """
+    A slot's counters rebuilt from every event up to `last_event_id`. Replays
+    start from the newest snapshot instead of the beginning of the ledger.
+    """
+    slot = models.ForeignKey(
+        ParkingSlot, on_delete=models.DO_NOTHING, db_constraint=False, related_name="ledger_snapshots"
+    )
+    last_event_id = models.BigIntegerField(db_index=True)
+    total_slots = models.IntegerField()
+    available_slots = models.IntegerField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.customer_name} - {self.slot.name} ({self.token})"
\ No newline at end of file
+        return f"Snapshot of {self.slot_id} at event {self.last_event_id}"
@@ -0,0 +1,181 @@
+"""
+Transactional outbox for booking confirmations.
+
+commit_bookings adds an outbox row next to every booking that has an email
+address (one summary row for a fleet booking), in the same transaction, so a
+confirmation is recorded if and only if the booking is. The drain_outbox worker
+delivers pending rows in batches over one long-lived SMTP connection, retrying
+with exponential backoff and marking a row dead after
+NOTIFICATION_OUTBOX['MAX_ATTEMPTS'] failures. When the SMTP server can't be
+reached the batch stops and its remaining rows are deferred without using up
+attempts, so an outage doesn't dead-letter the queue.
+"""
+import smtplib
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import NotificationOutbox
+
+DEFAULTS = {
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BASE_SECONDS': 30,
+}
+
+
+# Errors meaning the server or connection is gone rather than that a message
+# was refused. (smtplib.SMTPException is itself an OSError, so OSError is too broad.)
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError, socket.gaierror)
+
+
+class SMTPUnavailable(Exception):
+    pass
+
+
+def outbox_settings():
+    return {**DEFAULTS, **getattr(settings, 'NOTIFICATION_OUTBOX', {})}
+
+
+def confirmation_messages(bookings):
+    """Unsaved outbox rows confirming each booking that has an email address."""
+    return [
+        NotificationOutbox(
+            booking=booking,
+            channel="email",
+            recipient=booking.email,
+            subject=f"Booking confirmed - {booking.token}",
+            body=(
+                f"Hi {booking.customer_name},\n\n"
+                f"Your parking at {booking.slot.name} is confirmed.\n"
+                f"From: {booking.start_datetime:%Y-%m-%d %H:%M}\n"
+                f"To: {booking.end_datetime:%Y-%m-%d %H:%M}\n"
+                f"Vehicle: {booking.vehicle_number}\n\n"
+                f"Token: {booking.token}\n"
+                f"PIN: {booking.pin}\n"
+            ),
+        )
+        for booking in bookings
+        if booking.email
+    ]
+
+
+def fleet_confirmation_messages(bookings):
+    """A single outbox row listing every booking of a fleet, sent to its contact."""
+    if not bookings or not bookings[0].email:
+        return []
+    first = bookings[0]
+    vehicles = "".join(
+        f"{booking.vehicle_number} at {booking.slot.name} - Token: {booking.token}, PIN: {booking.pin}\n"
+        for booking in bookings
+    )
+    return [
+        NotificationOutbox(
+            booking=first,
+            channel="email",
+            recipient=first.email,
+            subject=f"Fleet booking confirmed - {len(bookings)} vehicles",
+            body=(
+                f"Hi {first.customer_name},\n\n"
+                f"Parking for your fleet of {len(bookings)} vehicles is confirmed.\n"
+                f"From: {first.start_datetime:%Y-%m-%d %H:%M}\n"
+                f"To: {first.end_datetime:%Y-%m-%d %H:%M}\n\n"
+                f"{vehicles}"
+            ),
+        )
+    ]
+
+
+class OutboxSender:
+    """Delivers outbox rows, keeping one SMTP connection open between batches."""
+
+    def __init__(self):
+        self.config = outbox_settings()
+        self.connection = None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _open(self):
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as exc:
+            raise SMTPUnavailable(exc) from exc
+        self.connection = connection
+
+    def _send(self, message):
+        """Send one message; raises SMTPUnavailable if the server can't be reached."""
+        # Servers drop connections left idle between batches, so a failure on a
+        # reused connection is retried once on a fresh one.
+        tries = 2 if self.connection is not None else 1
+        for attempt in range(tries):
+            if self.connection is None:
+                self._open()
+            try:
+                self.connection.send_messages([EmailMessage(
+                    subject=message.subject,
+                    body=message.body,
+                    to=[message.recipient],
+                    connection=self.connection,
+                )])
+                return
+            except CONNECTION_ERRORS as exc:
+                self.close()
+                if attempt == tries - 1:
+                    raise SMTPUnavailable(exc) from exc
+
+    def drain_batch(self):
+        """Send one batch of due messages. Returns (sent, failed, deferred) counts."""
+        now = timezone.now()
+        with transaction.atomic():
+            batch = list(
+                NotificationOutbox.objects
+                .select_for_update(skip_locked=True)
+                .filter(status="pending", next_attempt_at__lte=now)
+                .order_by("next_attempt_at", "id")[:self.config['BATCH_SIZE']]
+            )
+            # Push the claimed rows back so concurrent workers skip them while
+            # they're being sent; rows deferred below keep this retry time.
+            NotificationOutbox.objects.filter(pk__in=[m.pk for m in batch]).update(
+                next_attempt_at=now + timedelta(seconds=self.config['RETRY_BASE_SECONDS'])
+            )
+
+        sent, failed, deferred = [], [], []
+        for position, message in enumerate(batch):
+            try:
+                self._send(message)
+            except SMTPUnavailable as exc:
+                # Not these messages' fault: leave the rest of the batch at the
+                # retry time set when it was claimed, with its attempts intact.
+                deferred = batch[position:]
+                for pending in deferred:
+                    pending.last_error = str(exc.__cause__ or exc)[:1000]
+                break
+            except Exception as exc:
+                message.attempts += 1
+                message.last_error = str(exc)[:1000]
+                if message.attempts >= self.config['MAX_ATTEMPTS']:
+                    message.status = "dead"
+                else:
+                    delay = self.config['RETRY_BASE_SECONDS'] * 2 ** (message.attempts - 1)
+                    message.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+                failed.append(message)
+            else:
+                message.attempts += 1
+                message.status = "sent"
+                message.sent_at = timezone.now()
+                sent.append(message)
+
+        NotificationOutbox.objects.bulk_update(sent, ["status", "attempts", "sent_at"])
+        NotificationOutbox.objects.bulk_update(
+            failed, ["status", "attempts", "last_error", "next_attempt_at"]
+        )
+        NotificationOutbox.objects.bulk_update(deferred, ["last_error"])
+        return len(sent), len(failed), len(deferred)
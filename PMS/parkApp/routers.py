@@ -0,0 +1,45 @@
+from contextvars import ContextVar
+
+from django.db import connections
+
+# Set by ReadReplicaMiddleware for the duration of a read-only request.
+_use_replica = ContextVar('use_replica', default=False)
+
+REPLICA_ALIAS = 'replica'
+PRIMARY_ALIAS = 'default'
+
+
+def use_replica(enabled=True):
+    """Route reads in the current context to the replica; returns a reset token."""
+    return _use_replica.set(enabled)
+
+
+def reset_replica(token):
+    _use_replica.reset(token)
+
+
+class ReadReplicaRouter:
+    """
+    Sends reads made while serving a read-only view to the 'replica' connection
+    and every write (and every read inside a transaction) to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _use_replica.get() or REPLICA_ALIAS not in connections.settings:
+            return PRIMARY_ALIAS
+        # Reads inside a write transaction must see that transaction's rows.
+        if connections[PRIMARY_ALIAS].in_atomic_block:
+            return PRIMARY_ALIAS
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        dbs = {PRIMARY_ALIAS, REPLICA_ALIAS}
+        if obj1._state.db in dbs and obj2._state.db in dbs:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_ALIAS
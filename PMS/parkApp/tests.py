@@ -1,3 +1,630 @@
-from django.test import TestCase
+import smtplib
+import threading
+from datetime import timedelta
+from itertools import product
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from asgiref.sync import async_to_sync
+from django.db import transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .allocation import plan_allocation
+from .booking_writer import BookingRejected, BookingWriter, commit_bookings
+from .forecasting import HOURS_PER_WEEK, fit_hour_of_week, recompute_forecasts
+from .holds import create_hold, expire_holds, release_hold
+from .middleware import ReadReplicaMiddleware
+from .routers import reset_replica, use_replica
+from .ledger import capacity_event, cancel_bookings, discrepancies, rebuild_state, record, take_snapshot
+from .notifications import OutboxSender
+from .models import (
+    Booking, BookingEvent, BookingHold, LedgerSnapshot, NotificationOutbox, Organization, ParkingSlot, SlotForecast,
+)
+
+
+class ReadReplicaRoutingTests(TransactionTestCase):
+    # Not TestCase: its wrapping transaction would pin every read to the primary.
+    databases = {'default', 'replica'}
+
+    def read_db(self, method, path):
+        """The alias a slot read made while serving this request would use."""
+        used = []
+
+        def view(request):
+            used.append(ParkingSlot.objects.all().db)
+            return None
+
+        request = getattr(RequestFactory(), method.lower())(path)
+        ReadReplicaMiddleware(view)(request)
+        return used[0]
+
+    def test_get_on_a_replica_path_reads_from_the_replica(self):
+        self.assertEqual(self.read_db('GET', '/api/slots/'), 'replica')
+
+    def test_async_get_on_a_replica_path_reads_from_the_replica(self):
+        used = []
+
+        async def view(request):
+            used.append(ParkingSlot.objects.all().db)
+            return None
+
+        async_to_sync(ReadReplicaMiddleware(view))(RequestFactory().get('/api/async/slots/'))
+        self.assertEqual(used, ['replica'])
+
+    def test_unsafe_methods_and_other_paths_use_the_primary(self):
+        self.assertEqual(self.read_db('POST', '/api/slots/'), 'default')
+        self.assertEqual(self.read_db('DELETE', '/api/org-slots/'), 'default')
+        self.assertEqual(self.read_db('GET', '/api/bookings/'), 'default')
+        self.assertEqual(self.read_db('GET', '/book_slot/'), 'default')
+
+    def test_writes_and_reads_in_a_transaction_stay_on_the_primary(self):
+        token = use_replica()
+        try:
+            self.assertEqual(ParkingSlot.objects.all().db, 'replica')
+            with transaction.atomic():
+                self.assertEqual(ParkingSlot.objects.all().db, 'default')
+            org = make_org()
+            self.assertEqual(org._state.db, 'default')
+            self.assertEqual(Organization.objects.filter(pk=org.pk).update(city="Mysuru"), 1)
+        finally:
+            reset_replica(token)
+
+
+def make_org(**fields):
+    defaults = dict(
+        name="Central Mall",
+        org_type="mall",
+        address="1 Main Road",
+        city="Bengaluru",
+        state="KA",
+        zip_code="560001",
+        contact_person="Asha",
+        contact_phone="9999999999",
+        email="central@example.com",
+        password="x",
+    )
+    defaults.update(fields)
+    return Organization.objects.create(**defaults)
+
+
+def make_slot(org, total=2, **fields):
+    defaults = dict(name="Level 1", slot_type="4W", total_slots=total, available_slots=total, price=20)
+    defaults.update(fields)
+    return ParkingSlot.objects.create(organization=org, **defaults)
+
+
+def booking_request(slot, **fields):
+    start = timezone.now() + timedelta(hours=1)
+    request = {
+        'slot_id': slot.pk,
+        'customer_name': "Ravi",
+        'phone_number': "9876543210",
+        'email': "ravi@example.com",
+        'vehicle_type': "4W",
+        'vehicle_number': "KA01AB1234",
+        'start_datetime': start,
+        'end_datetime': start + timedelta(hours=2),
+        'total_cost': 40,
+        'status': "confirmed",
+    }
+    request.update(fields)
+    return request
+
+
+class CommitBookingsTests(TestCase):
+    def setUp(self):
+        self.slot = make_slot(make_org(), total=2)
+
+    def test_takes_capacity_until_the_slot_is_full(self):
+        results = commit_bookings([booking_request(self.slot) for _ in range(3)])
+
+        self.assertIsInstance(results[0], Booking)
+        self.assertIsInstance(results[1], Booking)
+        self.assertIsInstance(results[2], BookingRejected)
+        self.assertEqual(results[2].message, "No slots available")
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 0)
+        self.assertEqual(Booking.objects.count(), 2)
+
+    def test_booking_with_a_hold_uses_the_held_space(self):
+        self.slot.available_slots = 1
+        self.slot.save()
+        hold = BookingHold.objects.create(
+            slot=self.slot, token="held", expires_at=timezone.now() + timedelta(minutes=5)
+        )
+
+        results = commit_bookings([booking_request(self.slot, hold=hold.token)])
+
+        self.assertIsInstance(results[0], Booking)
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 1)
+        self.assertFalse(BookingHold.objects.exists())
+
+    def test_all_or_nothing_rolls_back_the_batch(self):
+        with self.assertRaises(BookingRejected):
+            commit_bookings([booking_request(self.slot) for _ in range(3)], all_or_nothing=True)
+
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 2)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_missing_required_field_is_rejected_without_retrying(self):
+        with mock.patch('parkApp.booking_writer.generate_token', return_value="ABC123") as token:
+            results = commit_bookings([booking_request(self.slot, customer_name=None)])
+
+        self.assertIsInstance(results[0], BookingRejected)
+        self.assertEqual(results[0].status_code, 400)
+        self.assertEqual(token.call_count, 1)
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 2)
+
+    def test_token_collision_is_retried(self):
+        commit_bookings([booking_request(self.slot, token="ABC123")])
+
+        with mock.patch('parkApp.booking_writer.generate_token', side_effect=["ABC123", "XYZ789"]):
+            results = commit_bookings([booking_request(self.slot)])
+
+        self.assertEqual(results[0].token, "XYZ789")
+
+
+class BookingCreateAPITests(TestCase):
+    def test_missing_customer_name_is_a_bad_request(self):
+        slot = make_slot(make_org())
+        response = self.client.post('/api/bookings/', {
+            'slot': slot.pk,
+            'phoneNumber': "9876543210",
+            'vehicleType': "4W",
+            'vehicleNumber': "KA01AB1234",
+            'startDate': "2030-01-01", 'startTime': "10:00",
+            'endDate': "2030-01-01", 'endTime': "12:00",
+        }, content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], "customerName is required")
+
+
+class BookingWriterTests(TestCase):
+    def test_failed_batch_resolves_every_waiting_request(self):
+        writer = BookingWriter(max_batch=10, max_wait_ms=1, max_queue=10, timeout_ms=2000)
+
+        with mock.patch('parkApp.booking_writer.commit_bookings', side_effect=RuntimeError("disk full")):
+            with self.assertRaisesMessage(RuntimeError, "disk full"):
+                writer.submit({'slot_id': 1})
+
+        self.assertTrue(writer._thread.is_alive())
+
+
+class ConcurrentBookingWriterTests(TransactionTestCase):
+    def test_concurrent_requests_share_one_batch(self):
+        slot = make_slot(make_org(), total=5)
+        writer = BookingWriter(max_batch=8, max_wait_ms=500, max_queue=10, timeout_ms=5000)
+        start = threading.Barrier(8)
+        outcomes = [None] * 8
+
+        def book(i):
+            start.wait()
+            try:
+                outcomes[i] = writer.submit(booking_request(slot, vehicle_number=f"KA01AB000{i}"))
+            except BookingRejected as exc:
+                outcomes[i] = exc
+
+        with mock.patch('parkApp.booking_writer.commit_bookings', wraps=commit_bookings) as batches:
+            threads = [threading.Thread(target=book, args=(i,)) for i in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual([len(call.args[0]) for call in batches.call_args_list], [8])
+        accepted = [o for o in outcomes if isinstance(o, Booking)]
+        rejected = [o for o in outcomes if isinstance(o, BookingRejected)]
+        self.assertEqual((len(accepted), len(rejected)), (5, 3))
+        self.assertTrue(all(o.message == "No slots available" for o in rejected))
+        # Each caller gets its own booking back.
+        self.assertEqual(len({b.vehicle_number for b in accepted}), 5)
+        slot.refresh_from_db()
+        self.assertEqual(slot.available_slots, 0)
+        self.assertEqual(Booking.objects.count(), 5)
+
+
+class HoldTests(TestCase):
+    def setUp(self):
+        self.slot = make_slot(make_org(), total=2)
+
+    def test_hold_takes_a_space_until_it_expires(self):
+        hold = create_hold(self.slot.pk)
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 1)
+
+        self.assertEqual(expire_holds(now=hold.expires_at - timedelta(seconds=1)), 0)
+        self.assertEqual(expire_holds(now=hold.expires_at), 1)
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 2)
+
+    def test_booking_consumes_the_hold(self):
+        hold = create_hold(self.slot.pk)
+        commit_bookings([booking_request(self.slot, hold=hold.token)])
+
+        self.assertEqual(expire_holds(now=hold.expires_at), 0)
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 1)
+
+    def test_consumed_hold_cannot_be_released_again(self):
+        hold = create_hold(self.slot.pk)
+        commit_bookings([booking_request(self.slot, hold=hold.token)])
+
+        self.assertFalse(release_hold(hold.token))
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 1)
+
+    def test_full_slot_cannot_be_held(self):
+        create_hold(self.slot.pk)
+        create_hold(self.slot.pk)
+        with self.assertRaisesMessage(BookingRejected, "No slots available"):
+            create_hold(self.slot.pk)
+
+
+class BookingHoldAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.slot = make_slot(make_org(), total=3)
+
+    def test_session_keeps_only_its_latest_hold(self):
+        for _ in range(3):
+            response = self.client.post('/api/holds/', {'slot': self.slot.pk}, content_type='application/json')
+            self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(BookingHold.objects.get().token, response.json()['hold'])
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 2)
+
+    def test_hold_creation_is_rate_limited_per_client(self):
+        self.slot.total_slots = self.slot.available_slots = 20
+        self.slot.save()
+        statuses = []
+        for _ in range(12):
+            self.client.cookies.clear()  # a fresh session every time
+            statuses.append(
+                self.client.post('/api/holds/', {'slot': self.slot.pk}, content_type='application/json').status_code
+            )
+
+        self.assertEqual(statuses.count(429), 2)
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 10)
+
+
+class ForecastTests(TestCase):
+    def test_only_weeks_with_history_are_averaged(self):
+        import numpy as np
+
+        # Slot 0 has bookings only in the last of eight weeks, slot 1 never.
+        occupancy = np.zeros((2, 8 * HOURS_PER_WEEK))
+        occupancy[0, 7 * HOURS_PER_WEEK + 10] = 3
+
+        forecast, history_weeks = fit_hour_of_week(occupancy, decay=0.8)
+
+        self.assertAlmostEqual(forecast[0, 10], 3)
+        self.assertEqual(list(history_weeks), [1, 0])
+        self.assertFalse(forecast[1].any())
+
+    def test_recompute_stores_the_history_actually_used(self):
+        org = make_org()
+        busy, idle = make_slot(org, total=5), make_slot(org, total=5, name="Level 2")
+        now = timezone.now()
+        last_week = now - timedelta(days=7 + now.weekday())
+        commit_bookings([booking_request(
+            busy, start_datetime=last_week, end_datetime=last_week + timedelta(hours=2)
+        )])
+
+        recompute_forecasts(weeks=8, now=now)
+
+        self.assertEqual(SlotForecast.objects.get(slot=busy).history_weeks, 1)
+        self.assertEqual(max(SlotForecast.objects.get(slot=busy).occupancy), 1)
+        self.assertEqual(SlotForecast.objects.get(slot=idle).history_weeks, 0)
+
+    def test_api_has_no_hours_for_a_slot_without_history(self):
+        slot = make_slot(make_org())
+        recompute_forecasts(weeks=8)
+
+        response = self.client.get(f'/api/slots/{slot.pk}/forecast/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['hours'], [])
+
+    def test_dashboard_says_so_when_no_slot_has_a_forecast(self):
+        org = make_org()
+        make_slot(org)
+        session = self.client.session
+        session['org_id'] = org.pk
+        session.save()
+
+        response = self.client.get('/org_dashboard/')
+
+        self.assertContains(response, "No forecasts yet")
+
+
+class DashboardStatsTests(TestCase):
+    def test_sync_and_async_stats_match(self):
+        org = make_org()
+        slot = make_slot(org)
+        commit_bookings([booking_request(slot, start_datetime=timezone.now(), total_cost=5)])
+        self.client.force_login(get_user_model().objects.create_user("owner", password="x"))
+        session = self.client.session
+        session['org_id'] = org.pk
+        session.save()
+
+        sync_stats = self.client.get('/api/org-dashboard-stats/').json()
+        async_stats = self.client.get('/api/async/org-dashboard-stats/').json()
+
+        self.assertEqual(sync_stats, async_stats)
+        self.assertEqual(async_stats['monthly_revenue'], 5.0)
+
+    def test_cancelled_bookings_are_not_counted(self):
+        org = make_org()
+        slot = make_slot(org)
+        record([capacity_event(slot, kind=BookingEvent.OPENED)])
+        kept, cancelled = commit_bookings(
+            [booking_request(slot, start_datetime=timezone.now(), total_cost=cost) for cost in (5, 7)]
+        )
+        cancel_bookings(Booking.objects.filter(pk=cancelled.pk))
+        self.client.force_login(get_user_model().objects.create_user("owner", password="x"))
+        session = self.client.session
+        session['org_id'] = org.pk
+        session.save()
+
+        for url in ('/api/org-dashboard-stats/', '/api/async/org-dashboard-stats/'):
+            stats = self.client.get(url).json()
+            self.assertEqual(stats['active_bookings'], 1, url)
+            self.assertEqual(stats['monthly_revenue'], 5.0, url)
+        self.assertEqual(rebuild_state()[slot.pk]['revenue'], 5)
+        self.assertEqual(self.client.get('/org_dashboard/').context['monthly_revenue'], 5)
+
+        recompute_forecasts(weeks=1, now=timezone.now() + timedelta(weeks=1))
+        self.assertEqual(max(SlotForecast.objects.get(slot=slot).occupancy), 1)
+
+
+class AllocationTests(TestCase):
+    def setUp(self):
+        org = make_org()
+        # (price per hour, distance, spaces); cost for 2 hours at 10/km in brackets.
+        self.cheap_far = make_slot(org, total=2, price=10, distance="3 km")    # 50
+        self.dear_near = make_slot(org, total=3, price=30, distance="500 m")   # 65
+        self.cheap_near = make_slot(org, total=1, price=15, distance="1 km")   # 40
+        make_slot(org, total=5, price=1, slot_type="2W")
+
+    def test_fills_the_cheapest_slots_first(self):
+        vehicles = [{'vehicle_type': "4W"}] * 4
+
+        assignments = plan_allocation(vehicles, hours=2, distance_weight=10)
+
+        used = [slot_id for _, slot_id, _ in assignments]
+        self.assertEqual(sorted(used), sorted([self.cheap_near.pk] + [self.cheap_far.pk] * 2 + [self.dear_near.pk]))
+        self.assertAlmostEqual(sum(cost for _, _, cost in assignments), 40 + 50 * 2 + 65)
+
+    def test_matches_brute_force_minimum(self):
+        slots = [(self.cheap_far.pk, 2, 50), (self.dear_near.pk, 3, 65), (self.cheap_near.pk, 1, 40)]
+        best = min(
+            sum(slots[i][2] for i in choice)
+            for choice in product(range(len(slots)), repeat=5)
+            if all(choice.count(i) <= slots[i][1] for i in range(len(slots)))
+        )
+
+        assignments = plan_allocation([{'vehicle_type': "4W"}] * 5, hours=2, distance_weight=10)
+
+        self.assertAlmostEqual(sum(cost for _, _, cost in assignments), best)
+
+    def test_fleet_too_large_is_rejected(self):
+        with self.assertRaisesMessage(BookingRejected, "Not enough 4W spaces"):
+            plan_allocation([{'vehicle_type': "4W"}] * 7, hours=2)
+
+
+class FleetBookingAPITests(TestCase):
+    def setUp(self):
+        make_slot(make_org(), total=5)
+        self.data = {
+            'customerName': "Fleet Co",
+            'phoneNumber': "9876543210",
+            'email': "fleet@example.com",
+            'vehicles': [{'vehicleType': "4W", 'vehicleNumber': f"KA01AB000{i}"} for i in range(3)],
+            'startDate': "2030-01-01", 'startTime': "10:00",
+            'endDate': "2030-01-01", 'endTime': "12:00",
+        }
+
+    def test_fleet_gets_one_confirmation(self):
+        response = self.client.post('/api/fleet-bookings/', self.data, content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Booking.objects.count(), 3)
+        message = NotificationOutbox.objects.get()
+        self.assertIn("fleet of 3 vehicles", message.body)
+        self.assertIn("KA01AB0002", message.body)
+
+    def test_distance_weight_must_be_finite_and_non_negative(self):
+        for weight in ("nan", "inf", -1, "far"):
+            response = self.client.post(
+                '/api/fleet-bookings/', {**self.data, 'distanceWeight': weight}, content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400, weight)
+        self.assertFalse(Booking.objects.exists())
+
+
+class ParkingSlotAdminSearchTests(TestCase):
+    def test_matches_the_start_of_slot_or_organization_names(self):
+        mall, airport = make_org(), make_org(name="Airport", email="airport@example.com")
+        level = make_slot(mall, name="Level 1")
+        terminal = make_slot(airport, name="Terminal A")
+        make_slot(mall, name="Basement")
+        model_admin = site._registry[ParkingSlot]
+
+        for term, expected in (("lev", [level]), ("AIR", [terminal]), ("vel", [])):
+            queryset, _ = model_admin.get_search_results(None, ParkingSlot.objects.all(), term)
+            self.assertEqual(list(queryset), expected, term)
+
+
+class OutboxSenderTests(TestCase):
+    def setUp(self):
+        slot = make_slot(make_org(), total=5)
+        commit_bookings([booking_request(slot, email=f"driver{i}@example.com") for i in range(3)])
+        self.connection = mock.Mock()
+        patcher = mock.patch('parkApp.notifications.get_connection', return_value=self.connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_delivers_over_one_connection(self):
+        self.assertEqual(OutboxSender().drain_batch(), (3, 0, 0))
+
+        self.connection.open.assert_called_once()
+        self.assertEqual(NotificationOutbox.objects.filter(status="sent", attempts=1).count(), 3)
+
+    def test_outage_defers_the_batch_without_using_attempts(self):
+        self.connection.open.side_effect = ConnectionRefusedError("refused")
+
+        self.assertEqual(OutboxSender().drain_batch(), (0, 0, 3))
+
+        self.connection.open.assert_called_once()
+        self.assertEqual(NotificationOutbox.objects.filter(status="pending", attempts=0).count(), 3)
+        self.assertEqual(OutboxSender().drain_batch(), (0, 0, 0))  # not due again yet
+
+    def test_disconnect_mid_batch_defers_the_rest(self):
+        gone = smtplib.SMTPServerDisconnected("gone")
+        self.connection.send_messages.side_effect = [1, gone, gone]
+
+        self.assertEqual(OutboxSender().drain_batch(), (1, 0, 2))
+        self.assertEqual(self.connection.open.call_count, 2)
+        self.assertEqual(NotificationOutbox.objects.filter(status="pending", attempts=0).count(), 2)
+
+    def test_idle_connection_dropped_by_the_server_is_reopened(self):
+        sender = OutboxSender()
+        self.connection.send_messages.side_effect = [1, 1, 1, smtplib.SMTPServerDisconnected("idle"), 1]
+        sender.drain_batch()
+        slot = ParkingSlot.objects.get()
+        commit_bookings([booking_request(slot, email="late@example.com")])
+
+        self.assertEqual(sender.drain_batch(), (1, 0, 0))
+        self.assertEqual(self.connection.open.call_count, 2)
+
+    def test_refused_recipient_keeps_the_connection(self):
+        refused = smtplib.SMTPRecipientsRefused({"driver0@example.com": (550, b"no such user")})
+        self.connection.send_messages.side_effect = [refused, 1, 1]
+        sender = OutboxSender()
+
+        self.assertEqual(sender.drain_batch(), (2, 1, 0))
+
+        self.connection.close.assert_not_called()
+        failed = NotificationOutbox.objects.get(status="pending")
+        self.assertEqual(failed.attempts, 1)
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+
+    def test_message_is_dead_lettered_after_its_last_attempt(self):
+        NotificationOutbox.objects.update(attempts=4)
+        self.connection.send_messages.side_effect = smtplib.SMTPDataError(554, b"rejected")
+
+        self.assertEqual(OutboxSender().drain_batch(), (0, 3, 0))
+        self.assertEqual(NotificationOutbox.objects.filter(status="dead", attempts=5).count(), 3)
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.slot = make_slot(make_org(), total=4)
+        record([capacity_event(self.slot, kind=BookingEvent.OPENED)])
+
+    def test_replay_matches_the_live_counters(self):
+        bookings = commit_bookings([booking_request(self.slot, total_cost=40) for _ in range(3)])
+        release_hold(create_hold(self.slot.pk).token)
+        create_hold(self.slot.pk)
+        cancel_bookings(Booking.objects.filter(pk=bookings[0].pk))
+
+        state = rebuild_state()[self.slot.pk]
+
+        self.assertEqual(state['total_slots'], 4)
+        self.assertEqual(state['available_slots'], 1)
+        self.assertEqual(state['revenue'], 80)
+        self.assertEqual(discrepancies(), [])
+
+    def test_snapshot_and_later_events_replay_the_same_state(self):
+        commit_bookings([booking_request(self.slot)])
+        before = rebuild_state()
+        take_snapshot()
+
+        self.assertEqual(rebuild_state(), before)
+        commit_bookings([booking_request(self.slot, total_cost=10)])
+        self.assertEqual(rebuild_state()[self.slot.pk]['revenue'], 50)
+        self.assertEqual(discrepancies(), [])
+
+    def test_counters_changed_outside_the_ledger_are_reported(self):
+        ParkingSlot.objects.filter(pk=self.slot.pk).update(available_slots=3)
+
+        self.assertEqual(discrepancies(), [(self.slot.pk, 'available_slots', 4, 3)])
+
+    def test_deleting_a_slot_keeps_its_history(self):
+        commit_bookings([booking_request(self.slot)])
+        take_snapshot()
+        slot_id = self.slot.pk
+
+        self.slot.delete()
+
+        self.assertEqual(BookingEvent.objects.filter(slot_id=slot_id).count(), 2)
+        self.assertTrue(LedgerSnapshot.objects.filter(slot_id=slot_id).exists())
+
+
+class BookingAdminLedgerTests(TestCase):
+    def setUp(self):
+        self.slot = make_slot(make_org(), total=4)
+        record([capacity_event(self.slot, kind=BookingEvent.OPENED)])
+        self.booking = commit_bookings([booking_request(self.slot)])[0]
+        self.client.force_login(get_user_model().objects.create_superuser("admin", password="x"))
+
+    def test_change_form_cannot_move_or_cancel_a_booking(self):
+        model_admin = site._registry[Booking]
+
+        readonly = model_admin.get_readonly_fields(None, self.booking)
+
+        self.assertTrue({'slot', 'status', 'total_cost'} <= set(readonly))
+
+    def add_booking(self):
+        return self.client.post('/admin/parkApp/booking/add/', {
+            'slot': self.slot.pk,
+            'customer_name': "Walk-in",
+            'phone_number': "9876543210",
+            'vehicle_type': "4W",
+            'vehicle_number': "KA01AB9999",
+            'start_datetime_0': "2030-01-01", 'start_datetime_1': "10:00:00",
+            'end_datetime_0': "2030-01-01", 'end_datetime_1': "12:00:00",
+            'total_cost': "40",
+        })
+
+    def test_add_takes_a_space_through_the_ledger(self):
+        response = self.add_booking()
+
+        self.assertEqual(response.status_code, 302)
+        booking = Booking.objects.get(customer_name="Walk-in")
+        self.assertEqual(len(booking.token), 6)
+        self.assertEqual(self.client.get(f'/admin/parkApp/booking/{booking.pk}/change/').status_code, 200)
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 2)
+        self.assertEqual(discrepancies(), [])
+
+    def test_add_on_a_full_slot_is_refused(self):
+        ParkingSlot.objects.filter(pk=self.slot.pk).update(available_slots=0)
+
+        response = self.add_booking()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "No slots available")
+        self.assertFalse(Booking.objects.filter(customer_name="Walk-in").exists())
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 0)
+
+    def test_delete_selected_returns_the_space_through_the_ledger(self):
+        response = self.client.post('/admin/parkApp/booking/', {
+            'action': 'delete_selected', '_selected_action': [self.booking.pk], 'post': 'yes',
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Booking.objects.exists())
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.available_slots, 4)
+        self.assertEqual(discrepancies(), [])
@@ -17,11 +17,23 @@ urlpatterns = [
     path('admin_dashboard/',views.admin_dashboard,name= 'admin_dashboard'),
     # API Endpoints
     path('api/bookings/', BookingCreateAPI.as_view(), name='api_bookings'),
+    path('api/fleet-bookings/', FleetBookingAPI.as_view(), name='api_fleet_bookings'),
+    path('api/holds/', BookingHoldCreateAPI.as_view(), name='api_holds'),
+    path('api/holds/<str:token>/', BookingHoldReleaseAPI.as_view(), name='api_hold_release'),
     path("api/organizations/", OrganizationListCreateAPI.as_view(), name="organization-list-create"),
     path("api/slots/", ParkingSlotListCreateAPI.as_view(), name="slot-list-create"),
+    path("api/slots/<int:pk>/forecast/", SlotForecastAPI.as_view(), name="slot-forecast"),
     
      # ---------------- New APIs for Dashboard ----------------
     path('api/org-dashboard-stats/', OrgDashboardStatsAPI.as_view(), name='org-dashboard-stats'),
     path('api/org-slots/', OrgSlotsAPI.as_view(), name='org-slots'),
     path('api/org-bookings/', OrgBookingsAPI.as_view(), name='org-bookings'),
+    path('api/org-forecast/', OrgForecastAPI.as_view(), name='org-forecast'),
+
+    # ---------------- Async read endpoints (ASGI) ----------------
+    path('api/async/slots/', views.async_slot_list, name='async-slot-list'),
+    path('api/async/org-slots/', views.async_org_slots, name='async-org-slots'),
+    path('api/async/org-bookings/', views.async_org_bookings, name='async-org-bookings'),
+    path('api/async/org-dashboard-stats/', views.async_org_dashboard_stats, name='async-org-dashboard-stats'),
+    path('booking_success/async/', views.async_booking_success, name='async_booking_success'),
 ]
@@ -1,14 +1,23 @@
 # views.py
+import asyncio
+import math
+from asgiref.sync import sync_to_async
+from django.db import transaction
 from django.db.models import Sum, Q
+from django.http import JsonResponse
 from datetime import datetime
 from django.shortcuts import render, redirect
 from rest_framework import generics
-from .models import Organization, ParkingSlot, Booking
+from .models import Organization, ParkingSlot, Booking, BookingEvent
 from .serializers import OrganizationSerializer, ParkingSlotSerializer, BookingSerializer
+from .booking_writer import BookingQueueFull, BookingRejected, submit_booking
+from .holds import create_hold, maybe_expire_holds, release_hold, sweep_due
+from .forecasting import get_forecast, upcoming_hours
+from .allocation import DEFAULT_DISTANCE_WEIGHT, book_fleet
+from .ledger import capacity_event, record
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
-import qrcode
 import base64
 from io import BytesIO
 from django.contrib import messages
@@ -16,6 +25,7 @@ from django.contrib.auth.hashers import make_password, check_password
 from django.contrib.auth import authenticate, login, logout, get_user_model
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.throttling import ScopedRateThrottle
 
 User = get_user_model()
 
@@ -49,12 +59,12 @@ def org_dashboard(request):
     # All slots of this organization
     slots = ParkingSlot.objects.filter(organization=org)
 
+    # Cancelled bookings hold no space and earn nothing.
+    bookings = Booking.objects.filter(slot__organization=org).exclude(status=Booking.CANCELLED)
+
     # Active bookings: bookings that haven't ended yet
     now = timezone.now()
-    active_bookings = Booking.objects.filter(
-        slot__organization=org,
-        end_datetime__gte=now
-    ).count()
+    active_bookings = bookings.filter(end_datetime__gte=now).count()
 
     # Available slots (sum of available_slots from all slots)
     available_slots = slots.aggregate(total_available=Sum('available_slots'))['total_available'] or 0
@@ -62,12 +72,19 @@ def org_dashboard(request):
     # Monthly revenue: sum of total_cost for bookings in current month
     current_month = datetime.now().month
     current_year = datetime.now().year
-    monthly_revenue = Booking.objects.filter(
-        slot__organization=org,
+    monthly_revenue = bookings.filter(
         start_datetime__year=current_year,
         start_datetime__month=current_month
     ).aggregate(total_revenue=Sum('total_cost'))['total_revenue'] or 0
 
+    # Expected occupancy over the next hours from the nightly forecasts
+    slot_forecasts = []
+    for slot in slots.select_related('forecast'):
+        forecast = get_forecast(slot)
+        # Slots without booking history yet are left out rather than shown as empty.
+        if forecast is not None:
+            slot_forecasts.append({'slot': slot, 'hours': upcoming_hours(forecast, slot.total_slots, now)})
+
     context = {
         'org_name': org.name,
         'total_slots': total_slots,
@@ -75,6 +92,7 @@ def org_dashboard(request):
         'available_slots': available_slots,
         'monthly_revenue': monthly_revenue,
         'slots': slots,  # ✅ pass slots for dynamic display
+        'slot_forecasts': slot_forecasts,
     }
 
     return render(request, 'org_dashboard.html', context)
@@ -185,6 +203,141 @@ class ParkingSlotListCreateAPI(generics.ListCreateAPIView):
     queryset = ParkingSlot.objects.all()
     serializer_class = ParkingSlotSerializer
 
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            slot = serializer.save()
+            record([capacity_event(slot, kind=BookingEvent.OPENED)])
+
+    def list(self, request, *args, **kwargs):
+        # Hand back capacity from abandoned checkouts before reporting availability.
+        maybe_expire_holds()
+        return super().list(request, *args, **kwargs)
+
+
+class FleetBookingAPI(APIView):
+    """Book a whole fleet of vehicles at once across the cheapest suitable slots."""
+
+    MAX_VEHICLES = 1000
+
+    def post(self, request):
+        data = request.data
+
+        vehicles = data.get('vehicles')
+        if not isinstance(vehicles, list) or not vehicles:
+            return Response({"error": "Provide at least one vehicle"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(vehicles) > self.MAX_VEHICLES:
+            return Response({"error": f"A fleet booking is limited to {self.MAX_VEHICLES} vehicles"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not all(isinstance(vehicle, dict) and vehicle.get('vehicleNumber') for vehicle in vehicles):
+            return Response({"error": "Every vehicle needs a vehicleType and vehicleNumber"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        error = missing_field_error(data, ('customerName', 'phoneNumber'))
+        if error:
+            return error
+
+        start_dt, end_dt, error = parse_booking_window(data)
+        if error:
+            return error
+
+        try:
+            distance_weight = float(data.get('distanceWeight', DEFAULT_DISTANCE_WEIGHT))
+        except (TypeError, ValueError):
+            distance_weight = None
+        # NaN or infinite costs would break the allocation's heap ordering.
+        if distance_weight is None or not math.isfinite(distance_weight) or distance_weight < 0:
+            return Response({"error": "distanceWeight must be a non-negative number"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            bookings = book_fleet(
+                vehicles=[
+                    {
+                        'vehicle_type': vehicle.get('vehicleType'),
+                        'vehicle_number': vehicle.get('vehicleNumber'),
+                        'vehicle_brand': vehicle.get('vehicleBrand', ''),
+                    }
+                    for vehicle in vehicles
+                ],
+                customer={
+                    'customer_name': data.get('customerName'),
+                    'phone_number': data.get('phoneNumber'),
+                    'email': data.get('email', ''),
+                },
+                start_dt=start_dt,
+                end_dt=end_dt,
+                area=(data.get('location') or '').strip(),
+                distance_weight=distance_weight,
+            )
+        except BookingRejected as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
+
+        return Response({
+            'total_cost': sum(booking.total_cost for booking in bookings),
+            'bookings': BookingSerializer(bookings, many=True).data,
+        }, status=status.HTTP_201_CREATED)
+
+
+class BookingHoldCreateAPI(APIView):
+    """
+    Hold a space for the visitor's session. Each session keeps one hold at a
+    time: taking a new one releases the previous one.
+    """
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'holds'
+
+    def post(self, request):
+        try:
+            slot_id = int(request.data.get('slot'))
+        except (TypeError, ValueError):
+            return Response({"error": "Slot not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            hold = create_hold(slot_id, replaces=request.session.get('hold'))
+        except BookingRejected as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
+        request.session['hold'] = hold.token
+
+        return Response({
+            'hold': hold.token,
+            'slot': hold.slot_id,
+            'expires_at': hold.expires_at,
+        }, status=status.HTTP_201_CREATED)
+
+
+class BookingHoldReleaseAPI(APIView):
+    def delete(self, request, token):
+        if request.session.get('hold') == token:
+            del request.session['hold']
+        if not release_hold(token):
+            return Response({"error": "Hold not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def missing_field_error(data, fields):
+    """Return a 400 response naming the first blank field in `fields`, or None."""
+    for field in fields:
+        value = data.get(field)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return Response({"error": f"{field} is required"}, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+
+def parse_booking_window(data):
+    """Return (start, end, None) from the startDate/startTime/endDate/endTime
+    fields, or (None, None, error response)."""
+    try:
+        start_dt = timezone.make_aware(datetime.strptime(
+            f"{data.get('startDate')} {data.get('startTime')}", "%Y-%m-%d %H:%M"))
+        end_dt = timezone.make_aware(datetime.strptime(
+            f"{data.get('endDate')} {data.get('endTime')}", "%Y-%m-%d %H:%M"))
+    except Exception:
+        return None, None, Response({"error": "Invalid start or end datetime"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+    if end_dt <= start_dt:
+        return None, None, Response({"error": "End datetime must be after start datetime"},
+                                    status=status.HTTP_400_BAD_REQUEST)
+    return start_dt, end_dt, None
+
 
 class BookingCreateAPI(generics.CreateAPIView):
     serializer_class = BookingSerializer
@@ -195,74 +348,75 @@ class BookingCreateAPI(generics.CreateAPIView):
 
         # Validate slot
         try:
-            slot = ParkingSlot.objects.get(id=data.get('slot'))
-        except ParkingSlot.DoesNotExist:
+            slot_id = int(data.get('slot'))
+        except (TypeError, ValueError):
             return Response({"error": "Slot not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        if slot.available_slots <= 0:
-            return Response({"error": "No slots available"}, status=status.HTTP_400_BAD_REQUEST)
+        error = missing_field_error(data, ('customerName', 'phoneNumber', 'vehicleType', 'vehicleNumber'))
+        if error:
+            return error
 
         # Validate datetime
-        try:
-            start_dt = timezone.make_aware(datetime.strptime(
-                f"{data.get('startDate')} {data.get('startTime')}", "%Y-%m-%d %H:%M"))
-            end_dt = timezone.make_aware(datetime.strptime(
-                f"{data.get('endDate')} {data.get('endTime')}", "%Y-%m-%d %H:%M"))
-            if end_dt <= start_dt:
-                return Response({"error": "End datetime must be after start datetime"},
-                                status=status.HTTP_400_BAD_REQUEST)
-        except Exception:
-            return Response({"error": "Invalid start or end datetime"},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        # Token & PIN
-        import random, string
-        token = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        pin = ''.join(random.choices(string.digits, k=4))
+        start_dt, end_dt, error = parse_booking_window(data)
+        if error:
+            return error
 
         try:
             total_cost = float(data.get('totalCost')) if data.get('totalCost') else 0
         except:
             total_cost = 0
 
-        booking = Booking.objects.create(
-            slot=slot,
-            customer_name=data.get('customerName'),
-            phone_number=data.get('phoneNumber'),
-            email=data.get('email', ''),
-            vehicle_type=data.get('vehicleType'),
-            vehicle_number=data.get('vehicleNumber'),
-            vehicle_brand=data.get('vehicleBrand', ''),
-            start_datetime=start_dt,
-            end_datetime=end_dt,
-            total_cost=total_cost,
-            token=token,
-            pin=pin,
-            status="confirmed"
-        )
-
-        slot.available_slots -= 1
-        slot.save()
+        # Capacity check, token & PIN, insert and counter update happen in
+        # booking_writer, batched with concurrent bookings when enabled.
+        try:
+            booking = submit_booking({
+                'slot_id': slot_id,
+                'customer_name': data.get('customerName'),
+                'phone_number': data.get('phoneNumber'),
+                'email': data.get('email', ''),
+                'vehicle_type': data.get('vehicleType'),
+                'vehicle_number': data.get('vehicleNumber'),
+                'vehicle_brand': data.get('vehicleBrand', ''),
+                'start_datetime': start_dt,
+                'end_datetime': end_dt,
+                'total_cost': total_cost,
+                'status': Booking.CONFIRMED,
+                'hold': data.get('hold'),
+            })
+        except BookingQueueFull:
+            return Response({"error": "Booking service is busy, please retry"},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={'Retry-After': '1'})
+        except BookingRejected as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
+
+        if data.get('hold') and request.session.get('hold') == data.get('hold'):
+            del request.session['hold']
 
         serializer = BookingSerializer(booking)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+def qr_code_base64(data):
+    # qrcode pulls in PIL; only booking success pages need it.
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, box_size=8, border=2)
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode()
+
+
 def booking_success(request):
     token = request.GET.get('token')
     pin = request.GET.get('pin')
 
     qr_data = f"Token: {token}\nPIN: {pin}" if token and pin else ""
 
-    qr_img_base64 = ""
-    if qr_data:
-        qr = qrcode.QRCode(version=1, box_size=8, border=2)
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        qr_img_base64 = base64.b64encode(buffered.getvalue()).decode()
+    qr_img_base64 = qr_code_base64(qr_data) if qr_data else ""
 
     return render(request, 'booking_success.html', {
         'token': token,
@@ -288,12 +442,12 @@ class OrgDashboardStatsAPI(APIView):
         available_slots = slots.aggregate(total_available=Sum('available_slots'))['total_available'] or 0
         occupied_slots = slots.aggregate(total_occupied=Sum('total_slots') - Sum('available_slots'))['total_occupied'] or 0
         now = timezone.now()
-        active_bookings = Booking.objects.filter(slot__organization=org, end_datetime__gte=now).count()
+        bookings = Booking.objects.filter(slot__organization=org).exclude(status=Booking.CANCELLED)
+        active_bookings = bookings.filter(end_datetime__gte=now).count()
 
         current_month = datetime.now().month
         current_year = datetime.now().year
-        monthly_revenue = Booking.objects.filter(
-            slot__organization=org,
+        monthly_revenue = bookings.filter(
             start_datetime__year=current_year,
             start_datetime__month=current_month
         ).aggregate(total_revenue=Sum('total_cost'))['total_revenue'] or 0
@@ -303,7 +457,7 @@ class OrgDashboardStatsAPI(APIView):
             'available_slots': available_slots,
             'occupied_slots': occupied_slots,
             'active_bookings': active_bookings,
-            'monthly_revenue': monthly_revenue,
+            'monthly_revenue': float(monthly_revenue),
         }
         return Response(data, status=status.HTTP_200_OK)
 
@@ -332,3 +486,150 @@ class OrgBookingsAPI(APIView):
         bookings = Booking.objects.filter(slot__organization_id=org_id).order_by('-start_datetime')
         serializer = BookingSerializer(bookings, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class SlotForecastAPI(APIView):
+    def get(self, request, pk):
+        try:
+            slot = ParkingSlot.objects.select_related('forecast').get(pk=pk)
+        except ParkingSlot.DoesNotExist:
+            return Response({"error": "Slot not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            hours = min(max(int(request.GET.get('hours', 12)), 1), 168)
+        except ValueError:
+            hours = 12
+
+        forecast = get_forecast(slot)
+        data = {
+            'slot': slot.id,
+            'total_slots': slot.total_slots,
+            'computed_at': forecast.computed_at if forecast else None,
+            'history_weeks': forecast.history_weeks if forecast else 0,
+            # No history means no prediction, not a slot that is likely free.
+            'hours': upcoming_hours(forecast, slot.total_slots, timezone.now(), hours) if forecast else [],
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class OrgForecastAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        org_id = request.session.get('org_id')
+        if not org_id:
+            return Response({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        now = timezone.now()
+        slots = ParkingSlot.objects.filter(organization_id=org_id).select_related('forecast').order_by('id')
+        data = []
+        for slot in slots:
+            forecast = get_forecast(slot)
+            data.append({
+                'slot': slot.id,
+                'name': slot.name,
+                'total_slots': slot.total_slots,
+                'hours': upcoming_hours(forecast, slot.total_slots, now) if forecast else [],
+            })
+        return Response(data, status=status.HTTP_200_OK)
+
+
+# ---------------- Async Read API Views ----------------
+# Async counterparts of the read-heavy endpoints for ASGI deployments
+# (uvicorn PMS.asgi:application). They don't hold a worker thread while
+# waiting on the database.
+
+async def _org_id_or_error(request):
+    """Return (org_id, None), or (None, error response) like the DRF views above."""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None, JsonResponse({"detail": "Authentication credentials were not provided."},
+                                  status=status.HTTP_403_FORBIDDEN)
+    org_id = await request.session.aget('org_id')
+    if not org_id:
+        return None, JsonResponse({"error": "Unauthorized"}, status=status.HTTP_401_UNAUTHORIZED)
+    return org_id, None
+
+
+async def async_slot_list(request):
+    if sweep_due():
+        await sync_to_async(maybe_expire_holds)()
+    slots = [slot async for slot in ParkingSlot.objects.select_related('organization')]
+    return JsonResponse(ParkingSlotSerializer(slots, many=True).data, safe=False)
+
+
+async def async_org_slots(request):
+    org_id, error = await _org_id_or_error(request)
+    if error:
+        return error
+
+    slots = [
+        slot async for slot in
+        ParkingSlot.objects.filter(organization_id=org_id).select_related('organization').order_by('id')
+    ]
+    return JsonResponse(ParkingSlotSerializer(slots, many=True).data, safe=False)
+
+
+async def async_org_bookings(request):
+    org_id, error = await _org_id_or_error(request)
+    if error:
+        return error
+
+    bookings = [
+        booking async for booking in
+        Booking.objects.filter(slot__organization_id=org_id).order_by('-start_datetime')
+    ]
+    return JsonResponse(BookingSerializer(bookings, many=True).data, safe=False)
+
+
+async def async_org_dashboard_stats(request):
+    org_id, error = await _org_id_or_error(request)
+    if error:
+        return error
+
+    now = timezone.now()
+    slots = ParkingSlot.objects.filter(organization_id=org_id)
+    bookings = Booking.objects.filter(slot__organization_id=org_id).exclude(status=Booking.CANCELLED)
+
+    # The queries are independent of each other, so issue them together.
+    try:
+        org, slot_totals, active_bookings, revenue = await asyncio.gather(
+            Organization.objects.aget(id=org_id),
+            slots.aaggregate(
+                total_available=Sum('available_slots'),
+                total_occupied=Sum('total_slots') - Sum('available_slots'),
+            ),
+            bookings.filter(end_datetime__gte=now).acount(),
+            bookings.filter(
+                start_datetime__year=now.year,
+                start_datetime__month=now.month,
+            ).aaggregate(total_revenue=Sum('total_cost')),
+        )
+    except Organization.DoesNotExist:
+        return JsonResponse({"error": "Organization not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    data = {
+        'total_slots': org.total_slots_2w + org.total_slots_4w,
+        'available_slots': slot_totals['total_available'] or 0,
+        'occupied_slots': slot_totals['total_occupied'] or 0,
+        'active_bookings': active_bookings,
+        # A number, as OrgDashboardStatsAPI returns it (JsonResponse would send a string).
+        'monthly_revenue': float(revenue['total_revenue'] or 0),
+    }
+    return JsonResponse(data)
+
+
+async def async_booking_success(request):
+    token = request.GET.get('token')
+    pin = request.GET.get('pin')
+
+    qr_data = f"Token: {token}\nPIN: {pin}" if token and pin else ""
+
+    # QR rendering is CPU work; keep it off the event loop.
+    qr_img_base64 = await asyncio.to_thread(qr_code_base64, qr_data) if qr_data else ""
+
+    return render(request, 'booking_success.html', {
+        'token': token,
+        'pin': pin,
+        'qr_img_base64': qr_img_base64
+    })
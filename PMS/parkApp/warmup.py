@@ -0,0 +1,69 @@
+"""
+Warm-up for application servers that fork workers.
+
+Called once in the master process (see gunicorn.conf.py) after the Django app
+is loaded and before workers are forked, it does the first-request work up
+front - building URL resolvers, compiling templates, building serializer
+fields - and, if asked, imports the libraries that views load lazily. Forked
+workers inherit all of it copy-on-write, so they start taking traffic
+immediately and share those pages instead of each building its own copy.
+
+The optional preload is off by default: it makes every process bigger, and
+servers that don't fork from a warmed master (uvicorn --workers) share nothing.
+NumPy is never preloaded; only the nightly recompute_forecasts command uses it.
+"""
+import importlib
+import os
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.urls import get_resolver
+
+# Imported lazily by the booking success pages (QR codes).
+OPTIONAL_MODULES = ('qrcode', 'PIL.PngImagePlugin')
+
+
+def _template_names():
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith('.html'):
+                    yield os.path.relpath(os.path.join(root, name), directory)
+
+
+def warm_up(preload_optional=False):
+    """Preload what the first requests would otherwise pay for."""
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+
+    for name in _template_names():
+        try:
+            get_template(name)
+        except TemplateDoesNotExist:
+            pass
+
+    from rest_framework.settings import api_settings
+
+    from . import serializers
+
+    for renderer in api_settings.DEFAULT_RENDERER_CLASSES + api_settings.DEFAULT_PARSER_CLASSES:
+        renderer()
+    for serializer in (
+        serializers.ParkingSlotSerializer,
+        serializers.OrganizationSerializer,
+        serializers.BookingSerializer,
+    ):
+        serializer().fields
+
+    if preload_optional:
+        for module in OPTIONAL_MODULES:
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                pass
+
+    # Connections must not be shared across forked workers.
+    connections.close_all()
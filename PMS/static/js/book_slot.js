@@ -3,6 +3,7 @@ class BookingManager {
     constructor() {
         this.availableSlots = [];
         this.selectedSlot = null;
+        this.hold = null;
         this.bookingForm = document.getElementById('bookingForm');
         this.locationSearch = document.getElementById('locationSearch');
         this.vehicleTypeFilter = document.getElementById('vehicleTypeFilter');
@@ -77,6 +78,9 @@ class BookingManager {
             vehicleNumberInput.addEventListener('input', (e) => this.formatVehicleNumber(e));
         }
 
+        // Give the held space back as soon as the customer leaves without booking
+        window.addEventListener('pagehide', () => this.releaseHold());
+
         const phoneInput = document.getElementById('phoneNumber');
         if (phoneInput) {
             phoneInput.addEventListener('input', (e) => {
@@ -190,10 +194,21 @@ class BookingManager {
         }, 300);
     }
 
-    selectSlot(slotId) {
+    async selectSlot(slotId) {
         this.selectedSlot = this.availableSlots.find(slot => slot.id === slotId);
         if (!this.selectedSlot) return;
 
+        // Reserve a space while the customer fills in the form
+        try {
+            await this.placeHold(slotId);
+        } catch (error) {
+            this.selectedSlot = null;
+            document.querySelectorAll('.slot-item').forEach(item => item.classList.remove('selected'));
+            if (this.selectedSlotInfo) this.selectedSlotInfo.style.display = 'none';
+            window.animationManager.showNotification(error.message, 'error');
+            return;
+        }
+
         document.querySelectorAll('.slot-item').forEach(item => {
             item.classList.toggle('selected', parseInt(item.dataset.slotId) === slotId);
         });
@@ -206,7 +221,47 @@ class BookingManager {
         }
 
         this.calculateDuration();
-        window.animationManager.showNotification(`Selected ${this.selectedSlot.name}`, 'success');
+        const heldUntil = new Date(this.hold.expires_at).toTimeString().slice(0, 5);
+        window.animationManager.showNotification(
+            `Selected ${this.selectedSlot.name} - held for you until ${heldUntil}`, 'success');
+    }
+
+    async placeHold(slotId) {
+        // The server releases this session's previous hold when it grants the new one
+        this.hold = null;
+
+        const response = await fetch("/api/holds/", {
+            method: "POST",
+            headers: {
+                "Content-Type": "application/json",
+                "X-CSRFToken": this.getCookie("csrftoken")
+            },
+            body: JSON.stringify({ slot: slotId }),
+        });
+
+        if (!response.ok) {
+            const errorData = await response.json();
+            throw new Error(errorData.error || "Could not reserve this slot");
+        }
+
+        this.hold = await response.json();
+    }
+
+    async releaseHold() {
+        if (!this.hold) return;
+        const token = this.hold.hold;
+        this.hold = null;
+
+        try {
+            await fetch(`/api/holds/${encodeURIComponent(token)}/`, {
+                method: "DELETE",
+                headers: { "X-CSRFToken": this.getCookie("csrftoken") },
+                keepalive: true  // lets the request finish while the page unloads
+            });
+        } catch (err) {
+            // The hold expires on its own
+            console.error("Error releasing hold:", err);
+        }
     }
 
     showSelectedSlotInfo() {
@@ -301,6 +356,7 @@ class BookingManager {
         startTime: bookingData.startTime,
         endDate: bookingData.endDate,
         endTime: bookingData.endTime,
+        hold: this.hold ? this.hold.hold : null,
         totalCost: parseFloat(
             document.getElementById("totalCost").textContent.replace('Rs.', '').trim()
         ) || 0
@@ -310,6 +366,7 @@ class BookingManager {
 
     try {
         const bookingResponse = await this.submitBooking(payload);
+        this.hold = null;  // consumed by the booking
         const params = new URLSearchParams({
             token: bookingResponse.token,
             pin: bookingResponse.pin
@@ -321,23 +378,23 @@ class BookingManager {
     }
 }
 
-    async submitBooking(payload) {
-        function getCookie(name) {
-            let cookieValue = null;
-            if (document.cookie && document.cookie !== "") {
-                const cookies = document.cookie.split(";");
-                for (let i = 0; i < cookies.length; i++) {
-                    const cookie = cookies[i].trim();
-                    if (cookie.startsWith(name + "=")) {
-                        cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
-                        break;
-                    }
+    getCookie(name) {
+        let cookieValue = null;
+        if (document.cookie && document.cookie !== "") {
+            const cookies = document.cookie.split(";");
+            for (let i = 0; i < cookies.length; i++) {
+                const cookie = cookies[i].trim();
+                if (cookie.startsWith(name + "=")) {
+                    cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                    break;
                 }
             }
-            return cookieValue;
         }
+        return cookieValue;
+    }
 
-        const csrftoken = getCookie("csrftoken");
+    async submitBooking(payload) {
+        const csrftoken = this.getCookie("csrftoken");
 
         console.log("Submitting booking payload:", payload);
 